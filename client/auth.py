@@ -0,0 +1,46 @@
+import pickle
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from .lru import LRUCache
+
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_CACHE_TTL', 300)
+TOKEN_LOCAL_CACHE_TTL = getattr(settings, 'TOKEN_LOCAL_CACHE_TTL', 5)
+TOKEN_LOCAL_CACHE_SIZE = getattr(settings, 'TOKEN_LOCAL_CACHE_SIZE', 4096)
+
+# Resolved users are kept pickled, with their profile already joined in, so
+# every request gets its own copy. The in-process LRU absorbs bursts and the
+# short local TTL bounds how long another process can serve a stale entry.
+# Invalidation clears the Django cache for all workers only when that cache is
+# Redis; the locmem fallback is per process (see CACHES in settings).
+_local_cache = LRUCache(maxsize=TOKEN_LOCAL_CACHE_SIZE, ttl=TOKEN_LOCAL_CACHE_TTL)
+
+# Create your auth here.
+def _token_key(key):
+	return f'auth:token:{key}'
+
+def _user_key(user_id):
+	return f'auth:user:{user_id}'
+
+def resolve_token(key):
+	payload = _local_cache.get(key)
+	if payload is None:
+		payload = cache.get(_token_key(key))
+		if payload is None:
+			token = Token.objects.select_related('user', 'user__profile').filter(key=key).first()
+			if token is None:
+				return None
+			payload = pickle.dumps(token.user)
+			cache.set_many({_token_key(key): payload, _user_key(token.user_id): key}, TOKEN_CACHE_TTL)
+		_local_cache.set(key, payload)
+	return pickle.loads(payload)
+
+def invalidate_token(key):
+	_local_cache.delete(key)
+	cache.delete(_token_key(key))
+
+def invalidate_user(user_id):
+	key = cache.get(_user_key(user_id))
+	if key:
+		invalidate_token(key)
+		cache.delete(_user_key(user_id))
@@ -0,0 +1,52 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+RESPONSE_CACHE_TTL = getattr(settings, 'RESPONSE_CACHE_TTL', 600)
+CACHE_VERSION_TTL = getattr(settings, 'CACHE_VERSION_TTL', 86400)
+
+# Cached responses are keyed on a per-object version stamp rather than
+# deleted on write: bumping the stamp orphans every cached variant at once
+# and changes the ETag, so a conditional GET can be answered from the stamp
+# alone. Stamps are random, so a cache flush can never resurrect an old one,
+# and one that expires just reads as a fresh version.
+
+# Create your response cache here.
+def _version_key(kind, pk):
+	return f'version:{kind}:{pk}'
+
+def _response_key(kind, pk, version, variant):
+	return f'response:{kind}:{pk}:{version}:{variant}'
+
+def get_version(kind, pk):
+	version = cache.get(_version_key(kind, pk))
+	if version is None:
+		version = uuid.uuid4().hex
+		# add() keeps whichever stamp another worker set first.
+		if not cache.add(_version_key(kind, pk), version, CACHE_VERSION_TTL):
+			version = cache.get(_version_key(kind, pk), version)
+	return version
+
+def bump_version(kind, *pks):
+	# Deferred until the writing transaction commits (immediate outside one):
+	# a read between the write and the commit would otherwise cache the old
+	# rows under the new stamp. Nothing is bumped if the transaction rolls back.
+	versions = {_version_key(kind, pk): uuid.uuid4().hex for pk in pks if pk is not None}
+	if versions:
+		transaction.on_commit(lambda: cache.set_many(versions, CACHE_VERSION_TTL))
+
+def request_variant(request):
+	# Everything in the query string except the credential shapes the body.
+	params = sorted((key, value) for key, values in request.GET.lists() if key != 'token' for value in values)
+	return hashlib.md5(repr(params).encode()).hexdigest()
+
+def make_etag(kind, pk, version, variant):
+	return '"%s"' % hashlib.md5(f'{kind}:{pk}:{version}:{variant}'.encode()).hexdigest()
+
+def get_cached_response(kind, pk, version, variant):
+	return cache.get(_response_key(kind, pk, version, variant))
+
+def set_cached_response(kind, pk, version, variant, data):
+	cache.set(_response_key(kind, pk, version, variant), data, RESPONSE_CACHE_TTL)
@@ -0,0 +1,151 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .geo import haversine, neighbour_cells
+from .models import Report, ReportCluster, CLUSTER_CELL_PRECISION
+from .signals import publish_reports
+
+CLUSTER_RADIUS = getattr(settings, 'REPORT_CLUSTER_RADIUS', 150) # metres
+CLUSTER_WINDOW = getattr(settings, 'REPORT_CLUSTER_WINDOW', 15) # minutes
+CLUSTER_PRELOAD_SIZE = 500
+
+# A new report joins the nearest earlier representative of the same type
+# within CLUSTER_RADIUS and CLUSTER_WINDOW. Candidates come from the report's
+# grid cell and its eight neighbours, which cover CLUSTER_RADIUS in every
+# direction below roughly 80 degrees latitude. Stored representatives for
+# those cells are loaded through the (cluster_cell, report_type, timestamp)
+# index into an in-memory grid, one query per CLUSTER_PRELOAD_SIZE reports,
+# and reports of the same upload join the grid as they are placed. Lookups
+# cost the same whatever the table size. A cluster row is only created once a
+# second report arrives.
+
+# Create your report clusters here.
+def _window():
+	return timedelta(minutes=CLUSTER_WINDOW)
+
+def _aware(value):
+	# Reports built in views carry naive local timestamps, stored ones come
+	# back aware.
+	return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+def _nearest(report, candidates):
+	best, best_distance = None, None
+	for candidate in candidates:
+		if abs(_aware(candidate.timestamp) - _aware(report.timestamp)) > _window():
+			continue
+		distance = haversine(report.latitude, report.longitude, candidate.latitude, candidate.longitude)
+		if distance <= CLUSTER_RADIUS and (best_distance is None or distance < best_distance):
+			best, best_distance = candidate, distance
+	return best
+
+def _cells(report):
+	# The report's own grid cell first, then its neighbours.
+	return neighbour_cells(report.latitude, report.longitude, CLUSTER_CELL_PRECISION)
+
+def _stored_candidates(reports, cells):
+	# Representatives in any of `cells` near the reports' time span, in one
+	# query over the (cluster_cell, report_type, timestamp) index.
+	timestamps = [_aware(report.timestamp) for report in reports]
+	return Report.objects.filter(
+		cluster_cell__in=cells,
+		report_type__in={report.report_type for report in reports},
+		is_duplicate=False,
+		timestamp__gte=min(timestamps) - _window(),
+		timestamp__lte=max(timestamps) + _window(),
+	).only('id', 'latitude', 'longitude', 'timestamp', 'report_type', 'cluster_cell', 'cluster_id')
+
+def cluster_reports(reports):
+	# Sets `cluster` and `is_duplicate` on unsaved reports before they are
+	# inserted. Stored representatives that gain their first duplicate are
+	# linked here; their ids go on to record_clusters().
+	reports = sorted(
+		(report for report in reports if report.latitude is not None and report.longitude is not None),
+		key=lambda report: _aware(report.timestamp))
+	grid = defaultdict(list)
+	loaded = set()
+	linked = []
+	for start in range(0, len(reports), CLUSTER_PRELOAD_SIZE):
+		chunk = reports[start:start + CLUSTER_PRELOAD_SIZE]
+		cells = [_cells(report) for report in chunk]
+		for candidate in _stored_candidates(chunk, {cell for report_cells in cells for cell in report_cells}):
+			if candidate.pk not in loaded:
+				loaded.add(candidate.pk)
+				grid[(candidate.report_type, candidate.cluster_cell)].append(candidate)
+		for report, report_cells in zip(chunk, cells):
+			representative = _nearest(report, [candidate for cell in report_cells for candidate in grid[(report.report_type, cell)]])
+			if representative is None:
+				grid[(report.report_type, report_cells[0])].append(report)
+				continue
+			if representative.cluster_id is None:
+				representative.cluster = ReportCluster.objects.create(
+					report_type=report.report_type, latitude=representative.latitude, longitude=representative.longitude,
+					first_seen=representative.timestamp, last_seen=representative.timestamp)
+				if representative.pk is not None:
+					# A concurrent upload may have linked the same representative
+					# since it was loaded; its cluster wins and ours is dropped.
+					claimed = Report.objects.filter(pk=representative.pk, cluster__isnull=True).update(
+						cluster=representative.cluster, last_modified=datetime.now())
+					if claimed:
+						linked.append(representative.pk)
+					else:
+						representative.cluster.delete()
+						representative.cluster_id = Report.objects.values_list('cluster_id', flat=True).get(pk=representative.pk)
+			report.cluster_id = representative.cluster_id
+			report.is_duplicate = True
+	return linked
+
+def release_failed(failed, created):
+	# Reports are clustered before they are inserted, so a representative that
+	# failed to insert leaves the duplicates of its upload in a cluster without
+	# one. The earliest of them takes its place, or goes back to being a plain
+	# report when it is the only one left. Runs before record_clusters().
+	clusters = {report.cluster_id for report in failed if report.cluster_id is not None and not report.is_duplicate}
+	if not clusters:
+		return
+	now = datetime.now()
+	members = defaultdict(list)
+	for report in created:
+		if report.cluster_id in clusters:
+			members[report.cluster_id].append(report)
+	for cluster_id in clusters:
+		reports = sorted(members[cluster_id], key=lambda report: _aware(report.timestamp))
+		if len(reports) > 1:
+			representative = reports[0]
+			representative.is_duplicate = False
+			representative.last_modified = now
+			Report.objects.filter(pk=representative.pk).update(is_duplicate=False, last_modified=now)
+			ReportCluster.objects.filter(pk=cluster_id).update(
+				latitude=representative.latitude, longitude=representative.longitude, first_seen=representative.timestamp)
+			continue
+		for report in reports:
+			report.cluster_id = None
+			report.is_duplicate = False
+			report.last_modified = now
+			Report.objects.filter(pk=report.pk).update(cluster=None, is_duplicate=False, last_modified=now)
+		ReportCluster.objects.filter(pk=cluster_id).delete()
+
+def record_clusters(reports, linked=()):
+	# Counts reports that were actually inserted, plus stored representatives
+	# cluster_reports() linked, into their cluster rows. Linked
+	# representatives are republished so clients pick up their cluster.
+	counts = Counter(report.cluster_id for report in reports if report.cluster_id is not None)
+	counts.update(Report.objects.filter(pk__in=linked).values_list('cluster_id', flat=True))
+	last_seen = {}
+	for report in reports:
+		if report.cluster_id is not None:
+			timestamp = _aware(report.timestamp)
+			last_seen[report.cluster_id] = max(last_seen.get(report.cluster_id, timestamp), timestamp)
+	for cluster_id, count in counts.items():
+		updates = {'report_count': F('report_count') + count}
+		if cluster_id in last_seen:
+			updates['last_seen'] = Greatest('last_seen', last_seen[cluster_id])
+		ReportCluster.objects.filter(pk=cluster_id).update(**updates)
+	if linked:
+		publish_reports(list(Report.objects.select_related('user').filter(pk__in=linked).order_by('last_modified', 'id')))
+
+def representatives(queryset):
+	# One report per incident: unclustered reports and cluster representatives.
+	return queryset.filter(is_duplicate=False)
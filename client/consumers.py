@@ -1,69 +1,210 @@
 import os
+import asyncio
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'futurepulse.settings')
 django.setup()
 
-import json
-from channels.generic.websocket import WebsocketConsumer
+from collections import deque
+from urllib.parse import parse_qs
+from django.contrib.auth.models import User
+from django.db.models import Q
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from datetime import datetime
+from rest_framework.exceptions import ValidationError
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
 from .models import Prediction, Report
+from .encoders import REPORT_ENCODER, PREDICTION_ENCODER, MSGPACK_SUBPROTOCOL, dumps, loads, packb, unpackb
+from .pagination import encode_cursor, decode_cursor
+from .clusters import representatives
+from .lifecycle import REPORT_EXPIRY_HOURS
+from .signals import REPORTS_GROUP
+from .auth import resolve_token
+from .notifications import subscription_groups
+
+SNAPSHOT_SIZE = 100
+DELTA_BATCH_SIZE = 500
+# A cursor further behind than this gets a fresh snapshot instead of every
+# change since; so does one older than the report expiry window.
+DELTA_MAX_BATCHES = 10
+# Newest live predictions sent per request; older ones are paged through
+# /api/predictions/.
+PREDICTION_SNAPSHOT_SIZE = 500
+
+# Rows are read with `async for` over sliced querysets, which fetches off the
+# event loop. aiterator() can't be used on the encoders' values_list()
+# querysets: in Django 5.2 their iterable runs the query before the first
+# chunk is handed to a thread, raising SynchronousOnlyOperation.
+NOTIFICATION_BATCH_SIZE = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 20)
+NOTIFICATION_BATCH_WINDOW = getattr(settings, 'NOTIFICATION_BATCH_WINDOW', 50)
 
 # Create your consumers here.
-class ReportConsumer(WebsocketConsumer):
-	def connect(self):
-		self.accept()
+class WireFormatMixin:
+	# JSON text frames by default; MessagePack binary frames when the client
+	# offers the `msgpack` subprotocol or connects with ?format=msgpack.
+	async def accept(self, subprotocol=None):
+		subprotocols = self.scope.get('subprotocols') or []
+		query = parse_qs(self.scope.get('query_string', b'').decode())
+		if MSGPACK_SUBPROTOCOL in subprotocols:
+			subprotocol = MSGPACK_SUBPROTOCOL
+		self.binary = subprotocol == MSGPACK_SUBPROTOCOL or query.get('format') == [MSGPACK_SUBPROTOCOL]
+		await super().accept(subprotocol)
 
-	def disconnect(self, close_code):
-		pass
+	async def send_data(self, data):
+		if self.binary:
+			await self.send(bytes_data=packb(data))
+		else:
+			await self.send(text_data=dumps(data))
+
+	def encode_rows(self, encoder, rows):
+		return encoder.encode_many_compact(rows) if self.binary else encoder.encode_many(rows)
+
+	def decode(self, text_data=None, bytes_data=None):
+		try:
+			return unpackb(bytes_data) if bytes_data is not None else loads(text_data)
+		except (ValueError, TypeError):
+			return None
+
+class ReportConsumer(WireFormatMixin, AsyncWebsocketConsumer):
+	async def connect(self):
+		# Join the group before reading so no update committed in between is lost;
+		# clients de-duplicate on report id.
+		await self.channel_layer.group_add(REPORTS_GROUP, self.channel_name)
+		await self.accept()
+		since = parse_qs(self.scope.get('query_string', b'').decode()).get('since')
+		if since:
+			await self.send_since(since[0])
+		else:
+			await self.send_snapshot()
+
+	async def disconnect(self, close_code):
+		await self.channel_layer.group_discard(REPORTS_GROUP, self.channel_name)
+
+	async def receive(self, text_data=None, bytes_data=None):
+		message = self.decode(text_data, bytes_data)
+		since = message.get('since') if isinstance(message, dict) else None
+		if since:
+			await self.send_since(since)
 
-	def receive(self, text_data):
-		reports = Report.objects.all().order_by('-timestamp')
-		data = []
-		for report in reports:
-			data.append({
-				'location': report.location,
-				'report_type': report.report_type,
-				'description': report.description,
-				'status': report.status,
-				'verification_status': report.verification_status,
-				'rating': report.rating,
-				'timestamp': report.timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
-				'username': report.user.username,
-				'profile-picture': None,
+	async def send_snapshot(self):
+		latest = await Report.objects.order_by('-last_modified', '-id').afirst()
+		reports = REPORT_ENCODER.values(representatives(Report.objects.order_by('-timestamp', '-id')))[:SNAPSHOT_SIZE]
+		await self.send_data({
+			'type': 'snapshot',
+			'reports': self.encode_rows(REPORT_ENCODER, [report async for report in reports]),
+			'cursor': encode_cursor(latest.last_modified, latest.id) if latest else None,
+		})
+
+	async def send_since(self, cursor):
+		try:
+			last_modified, pk = decode_cursor(cursor)
+		except ValidationError:
+			return await self.send_snapshot()
+		if timezone.is_naive(last_modified):
+			last_modified = timezone.make_aware(last_modified)
+		if last_modified < timezone.now() - timedelta(hours=REPORT_EXPIRY_HOURS) or await Report.objects.filter(
+			Q(last_modified__gte=last_modified), Q(last_modified__gt=last_modified) | Q(id__gt=pk)
+		).order_by('last_modified', 'id')[DELTA_MAX_BATCHES * DELTA_BATCH_SIZE:].aexists():
+			return await self.send_snapshot()
+		while True:
+			# last_modified only drives the cursor; it is not part of the payload.
+			reports = REPORT_ENCODER.values(Report.objects.filter(
+				Q(last_modified__gte=last_modified), Q(last_modified__gt=last_modified) | Q(id__gt=pk)
+			).order_by('last_modified', 'id'), 'last_modified')[:DELTA_BATCH_SIZE]
+			reports = [report async for report in reports]
+			if not reports:
+				break
+			last_modified, pk = reports[-1][-1], reports[-1][REPORT_ENCODER.index('id')]
+			# Duplicates still advance the cursor but are not sent.
+			is_duplicate = REPORT_ENCODER.index('is_duplicate')
+			await self.send_data({
+				'type': 'update',
+				'reports': self.encode_rows(REPORT_ENCODER, [report for report in reports if not report[is_duplicate]]),
+				'cursor': encode_cursor(last_modified, pk),
 			})
-		self.send(text_data=json.dumps(data))
+			if len(reports) < DELTA_BATCH_SIZE:
+				break
+
+	async def report_update(self, event):
+		message = event['message']
+		await self.send_data({'type': 'update', 'reports': message['reports'], 'cursor': message['cursor']})
 
-class PredictionConsumer(WebsocketConsumer):
-	def connect(self):
-		self.accept()
+class PredictionConsumer(WireFormatMixin, AsyncWebsocketConsumer):
+	async def connect(self):
+		await self.accept()
 
-	def disconnect(self, close_code):
+	async def disconnect(self, close_code):
 		pass
 
-	def receive(self, text_data):
-		predictions = Prediction.objects.filter(valid_until__gte=datetime.now()).order_by('-timestamp')
-		data = []
-		for prediction in predictions:
-			data.append({
-				'predicted_event': prediction.predicted_event,
-				'generated_text': prediction.generated_text,
-				'confidence_score': prediction.confidence_score,
-				'valid_until': prediction.valid_until.strftime("%Y-%m-%dT%H:%M:%SZ"),
-				'ai_model_version': prediction.ai_model_version,
-			})
-		self.send(text_data=json.dumps(data))
+	async def receive(self, text_data=None, bytes_data=None):
+		predictions = PREDICTION_ENCODER.values(
+			Prediction.objects.filter(valid_until__gte=datetime.now()).order_by('-timestamp', '-id'),
+		)[:PREDICTION_SNAPSHOT_SIZE]
+		data = self.encode_rows(PREDICTION_ENCODER, [prediction async for prediction in predictions])
+		await self.send_data(data)
+
+class NotificationConsumer(WireFormatMixin, AsyncWebsocketConsumer):
+	batch_size = NOTIFICATION_BATCH_SIZE
+	batch_window = NOTIFICATION_BATCH_WINDOW
 
-class NotificationConsumer(AsyncWebsocketConsumer):
 	async def connect(self):
-		self.group_name = 'notifications'
-		await self.channel_layer.group_add(self.group_name, self.channel_name)
+		query = parse_qs(self.scope.get('query_string', b'').decode())
+		user = self.scope.get('user')
+		if query.get('token'):
+			user = await database_sync_to_async(resolve_token)(query['token'][0])
+		elif user is not None and user.is_authenticated:
+			user = await database_sync_to_async(User.objects.select_related('profile').get)(pk=user.pk)
+		else:
+			user = None
+		self.notification_groups = await database_sync_to_async(subscription_groups)(
+			user, query.get('latitude', [None])[0], query.get('longitude', [None])[0],
+		)
+		# A user in both their own group and a region group would otherwise get
+		# the same prediction twice.
+		self.recent = deque(maxlen=256)
+		self.pending = []
+		self.flush_task = None
+		# Coalesced frames are opt-in: existing clients only parse the single
+		# {"notification": ...} shape.
+		self.batching = query.get('batch', [''])[0] in ('1', 'true')
+		for group in self.notification_groups:
+			await self.channel_layer.group_add(group, self.channel_name)
 		await self.accept()
 
 	async def disconnect(self, close_code):
-		await self.channel_layer.group_discard(self.group_name, self.channel_name)
+		if self.flush_task is not None:
+			self.flush_task.cancel()
+		for group in self.notification_groups:
+			await self.channel_layer.group_discard(group, self.channel_name)
 
 	async def send_notification(self, event):
 		message = event['message']
-		await self.send(text_data=json.dumps({ 'notification': message }))
+		if message.get('id') is not None:
+			if message['id'] in self.recent:
+				return
+			self.recent.append(message['id'])
+		# With ?batch=1 bursts are coalesced: the first event opens a window of
+		# `batch_window` ms and everything arriving within it goes out as one
+		# frame, or sooner once `batch_size` are waiting.
+		self.pending.append(message)
+		if not self.batching or len(self.pending) >= self.batch_size or self.batch_window <= 0:
+			await self.flush_notifications()
+		elif self.flush_task is None:
+			self.flush_task = asyncio.ensure_future(self.flush_after(self.batch_window / 1000))
+
+	async def flush_after(self, delay):
+		await asyncio.sleep(delay)
+		self.flush_task = None
+		await self.flush_notifications()
+
+	async def flush_notifications(self):
+		if self.flush_task is not None:
+			self.flush_task.cancel()
+			self.flush_task = None
+		pending, self.pending = self.pending, []
+		if len(pending) == 1:
+			await self.send_data({ 'notification': pending[0] })
+		elif pending:
+			await self.send_data({ 'notifications': pending })
@@ -0,0 +1,181 @@
+import json
+import msgpack
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from .models import Report, Prediction, Feedback
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+# Read-only encoders for list endpoints and sockets. Rows come straight from
+# `.values()`, so no model instances or serializer fields are built per row;
+# the output matches the `fields='__all__'` ModelSerializers field for field.
+
+# The binary socket format: MessagePack frames with short keys, epoch
+# millisecond timestamps and float coordinates. Encoders produce it straight
+# from rows; compact() derives it from the JSON shape for outbox payloads.
+MSGPACK_SUBPROTOCOL = 'msgpack'
+COMPACT_KEYS = {
+	'id': 'i', 'type': 'ty', 'reports': 'rs', 'cursor': 'c', 'notification': 'n', 'notifications': 'ns',
+	'location': 'lo', 'latitude': 'la', 'longitude': 'ln', 'report_type': 'rt', 'description': 'd',
+	'timestamp': 'ts', 'last_modified': 'lm', 'status': 's', 'sensor_data': 'sd', 'verification_status': 'v',
+	'rating': 'r', 'user': 'u', 'username': 'un', 'report': 'rp',
+	'predicted_event': 'pe', 'generated_text': 'gt', 'confidence_score': 'cs', 'valid_until': 'vu',
+	'ai_model_version': 'm', 'distance': 'dt', 'cluster': 'cl', 'is_duplicate': 'dp',
+	'source': 'so',
+}
+EPOCH_KEYS = frozenset(('timestamp', 'last_modified', 'valid_until'))
+FLOAT_KEYS = frozenset(('latitude', 'longitude'))
+OPAQUE_KEYS = frozenset(('sensor_data',))
+
+# Create your encoders here.
+def _datetime(value):
+	if value is None or isinstance(value, str):
+		return value
+	if value.tzinfo is None and settings.USE_TZ:
+		value = timezone.make_aware(value)
+	value = value.isoformat()
+	return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+def _decimal(value, decimal_places):
+	if value is None:
+		return None
+	return format(Decimal(value) if isinstance(value, str) else value, '.%df' % decimal_places)
+
+def _epoch_ms(value):
+	if isinstance(value, str):
+		try:
+			value = datetime.fromisoformat(value)
+		except ValueError:
+			return value
+	if not isinstance(value, datetime):
+		return value
+	if value.tzinfo is None:
+		value = timezone.make_aware(value)
+	return int(value.timestamp() * 1000)
+
+def _float(value):
+	return None if value is None else float(value)
+
+def _converter(field):
+	if isinstance(field, models.DateTimeField):
+		return _datetime
+	if isinstance(field, models.DecimalField):
+		return partial(_decimal, decimal_places=field.decimal_places)
+	return None
+
+def _compact_converter(field):
+	if isinstance(field, models.DateTimeField):
+		return _epoch_ms
+	if isinstance(field, models.DecimalField):
+		return _float
+	return None
+
+class Compacted(list):
+	# Items already in the binary shape; compact() passes them through.
+	pass
+
+class Encoder:
+	def __init__(self, model, related=None, exclude=()):
+		# `related` maps extra output keys to `.values()` lookups, e.g.
+		# {'username': 'user__username'}; `exclude` drops internal columns.
+		related = related or {}
+		fields = [field for field in model._meta.concrete_fields if field.name not in exclude]
+		self.keys = tuple(field.name for field in fields) + tuple(related)
+		self.lookups = tuple(field.name for field in fields) + tuple(related.values())
+		self.attnames = tuple(field.attname for field in fields) + tuple(related.values())
+		self.converters = tuple(
+			(index, converter)
+			for index, converter in enumerate(_converter(field) for field in fields)
+			if converter is not None
+		)
+		self.compact_keys = tuple(COMPACT_KEYS.get(key, key) for key in self.keys)
+		self.compact_converters = tuple(
+			(index, converter)
+			for index, converter in enumerate(_compact_converter(field) for field in fields)
+			if converter is not None
+		)
+
+	def index(self, key):
+		return self.keys.index(key)
+
+	def values(self, queryset, *extra):
+		# Extra lookups are appended after the encoded columns and dropped by
+		# encode(), e.g. a search rank the caller needs for its cursor.
+		return queryset.values_list(*self.lookups, *extra)
+
+	def encode(self, row):
+		row = list(row)
+		for index, converter in self.converters:
+			row[index] = converter(row[index])
+		return dict(zip(self.keys, row))
+
+	def encode_many(self, rows):
+		return [self.encode(row) for row in rows]
+
+	def encode_compact(self, row):
+		row = list(row)
+		for index, converter in self.compact_converters:
+			row[index] = converter(row[index])
+		return dict(zip(self.compact_keys, row))
+
+	def encode_many_compact(self, rows):
+		return Compacted(self.encode_compact(row) for row in rows)
+
+	def encode_instance(self, instance):
+		row = []
+		for attname in self.attnames:
+			value = instance
+			for part in attname.split('__'):
+				value = getattr(value, part)
+			row.append(value)
+		return self.encode(row)
+
+# Columns maintained for indexes and cursors are not part of the payload.
+REPORT_EXCLUDE = ('geocell', 'cluster_cell', 'last_modified')
+FEEDBACK_EXCLUDE = ('root', 'path', 'depth', 'reply_count')
+
+REPORT_ENCODER = Encoder(Report, {'username': 'user__username'}, exclude=REPORT_EXCLUDE)
+PREDICTION_ENCODER = Encoder(Prediction)
+FEEDBACK_ENCODER = Encoder(Feedback, exclude=FEEDBACK_EXCLUDE)
+
+def dumps(data):
+	if orjson is not None:
+		return orjson.dumps(data, default=str, option=orjson.OPT_UTC_Z).decode()
+	return json.dumps(data, cls=JSONEncoder)
+
+def loads(data):
+	if orjson is not None:
+		return orjson.loads(data)
+	return json.loads(data)
+
+def compact(data):
+	if isinstance(data, Compacted):
+		return data
+	if isinstance(data, list):
+		return [compact(item) for item in data]
+	if not isinstance(data, dict):
+		return data
+	items = {}
+	for key, value in data.items():
+		if key in EPOCH_KEYS:
+			value = _epoch_ms(value)
+		elif key in FLOAT_KEYS:
+			value = _float(value)
+		elif key not in OPAQUE_KEYS:
+			value = compact(value)
+		items[COMPACT_KEYS.get(key, key)] = value
+	return items
+
+def packb(data):
+	return msgpack.packb(compact(data), use_bin_type=True, default=str)
+
+def unpackb(data):
+	return msgpack.unpackb(data, raw=False)
@@ -0,0 +1,166 @@
+import math
+import operator
+from functools import reduce
+from django.db.models import Q
+
+# Reports are indexed by a 50-bit interleaved (Morton / geohash) cell code.
+# Every geohash prefix maps onto a contiguous range of codes, so a bounding
+# box becomes a handful of integer range scans on a plain B-tree index.
+GEOCELL_BITS = 50
+MAX_COVER_CELLS = 16
+EARTH_RADIUS = 6371008.8
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Create your geo helpers here.
+def _cell_indexes(latitude, longitude, bits):
+	lat_bits = bits // 2
+	lng_bits = bits - lat_bits
+	lat_index = int((latitude + 90) / 180 * (1 << lat_bits))
+	lng_index = int((longitude + 180) / 360 * (1 << lng_bits))
+	return min(max(lat_index, 0), (1 << lat_bits) - 1), min(max(lng_index, 0), (1 << lng_bits) - 1)
+
+def _spread(value):
+	# Moves bit i of a value below 2**32 to bit 2i.
+	value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+	value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+	value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+	value = (value | (value << 2)) & 0x3333333333333333
+	return (value | (value << 1)) & 0x5555555555555555
+
+def _interleave(lat_index, lng_index, bits):
+	# Longitude takes the top bit, so it holds the odd positions when `bits`
+	# is even and the even ones when it is odd.
+	if bits % 2 == 0:
+		return (_spread(lng_index) << 1) | _spread(lat_index)
+	return _spread(lng_index) | (_spread(lat_index) << 1)
+
+def geocell(latitude, longitude):
+	return _interleave(*_cell_indexes(float(latitude), float(longitude), GEOCELL_BITS), GEOCELL_BITS)
+
+def geohash(latitude, longitude, precision=6):
+	code = geocell(latitude, longitude) >> (GEOCELL_BITS - 5 * precision)
+	return ''.join(BASE32[(code >> (5 * i)) & 31] for i in reversed(range(precision)))
+
+def geohash_range(cell):
+	# The [low, high) geocell codes covered by a geohash prefix.
+	cell = str(cell).lower()
+	if not 0 < len(cell) <= GEOCELL_BITS // 5 or any(char not in BASE32 for char in cell):
+		return None
+	code = 0
+	for char in cell:
+		code = (code << 5) | BASE32.index(char)
+	shift = GEOCELL_BITS - 5 * len(cell)
+	return code << shift, (code + 1) << shift
+
+def cell_size(precision):
+	lat_bits = 5 * precision // 2
+	return 180 / (1 << lat_bits), 360 / (1 << (5 * precision - lat_bits))
+
+def neighbours(latitude, longitude, precision=6):
+	# The cell containing the point plus the eight around it.
+	height, width = cell_size(precision)
+	latitude, longitude = float(latitude), float(longitude)
+	cells = []
+	for delta_lat in (-height, 0, height):
+		for delta_lng in (-width, 0, width):
+			lat = latitude + delta_lat
+			if not -90 <= lat <= 90:
+				continue
+			lng = (longitude + delta_lng + 180) % 360 - 180
+			cell = geohash(lat, lng, precision)
+			if cell not in cells:
+				cells.append(cell)
+	return cells
+
+def neighbour_cells(latitude, longitude, precision=6):
+	# Like neighbours(), as geocell prefixes (geocell >> (GEOCELL_BITS - 5 *
+	# precision)) instead of strings; the point's own cell comes first.
+	bits = 5 * precision
+	lat_index, lng_index = _cell_indexes(float(latitude), float(longitude), GEOCELL_BITS)
+	lat_index >>= GEOCELL_BITS // 2 - bits // 2
+	lng_index >>= GEOCELL_BITS - GEOCELL_BITS // 2 - (bits - bits // 2)
+	lat_count, lng_count = 1 << (bits // 2), 1 << (bits - bits // 2)
+	cells = [_interleave(lat_index, lng_index, bits)]
+	for delta_lat in (-1, 0, 1):
+		for delta_lng in (-1, 0, 1):
+			lat = lat_index + delta_lat
+			if not 0 <= lat < lat_count or not delta_lat and not delta_lng:
+				continue
+			cell = _interleave(lat, (lng_index + delta_lng) % lng_count, bits)
+			if cell not in cells:
+				cells.append(cell)
+	return cells
+
+def parse_point(value):
+	try:
+		latitude, longitude = [float(part) for part in str(value).split(',')]
+	except (TypeError, ValueError):
+		return None
+	if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+		return latitude, longitude
+	return None
+
+def haversine(lat1, lng1, lat2, lng2):
+	lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+	a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+	return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+def radius_bbox(latitude, longitude, radius):
+	latitude, longitude = float(latitude), float(longitude)
+	delta_lat = math.degrees(radius / EARTH_RADIUS)
+	min_lat, max_lat = max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0)
+	if min_lat == -90.0 or max_lat == 90.0:
+		return min_lat, -180.0, max_lat, 180.0
+	delta_lng = math.degrees(radius / (EARTH_RADIUS * math.cos(math.radians(latitude))))
+	if delta_lng >= 180:
+		return min_lat, -180.0, max_lat, 180.0
+	return min_lat, longitude - delta_lng, max_lat, longitude + delta_lng
+
+def split_bbox(min_lat, min_lng, max_lat, max_lng):
+	# Boxes that cross the antimeridian are split into two plain boxes.
+	if min_lng < -180:
+		return [(min_lat, min_lng + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+	if max_lng > 180:
+		return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng - 360)]
+	if min_lng > max_lng:
+		return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+	return [(min_lat, min_lng, max_lat, max_lng)]
+
+def cover(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_COVER_CELLS):
+	# Pick the finest cell size that covers the box with at most `max_cells`
+	# cells, then merge neighbouring codes into [low, high) ranges.
+	for bits in range(GEOCELL_BITS, 0, -1):
+		lat_low, lng_low = _cell_indexes(min_lat, min_lng, bits)
+		lat_high, lng_high = _cell_indexes(max_lat, max_lng, bits)
+		if (lat_high - lat_low + 1) * (lng_high - lng_low + 1) <= max_cells:
+			break
+	shift = GEOCELL_BITS - bits
+	codes = sorted(
+		_interleave(lat_index, lng_index, bits)
+		for lat_index in range(lat_low, lat_high + 1)
+		for lng_index in range(lng_low, lng_high + 1)
+	)
+	ranges = []
+	for code in codes:
+		if ranges and ranges[-1][1] == code << shift:
+			ranges[-1][1] = (code + 1) << shift
+		else:
+			ranges.append([code << shift, (code + 1) << shift])
+	return [tuple(cell_range) for cell_range in ranges]
+
+def bbox_q(min_lat, min_lng, max_lat, max_lng):
+	# Only the cell ranges go to the database; candidates are refined against
+	# the exact box (and radius) in Python so the planner always picks the
+	# geocell index.
+	return reduce(operator.or_, (
+		Q(geocell__gte=low, geocell__lt=high)
+		for box in split_bbox(min_lat, min_lng, max_lat, max_lng)
+		for low, high in cover(*box)
+	))
+
+def in_bbox(latitude, longitude, min_lat, min_lng, max_lat, max_lng):
+	latitude, longitude = float(latitude), float(longitude)
+	return any(
+		box[0] <= latitude <= box[2] and box[1] <= longitude <= box[3]
+		for box in split_bbox(min_lat, min_lng, max_lat, max_lng)
+	)
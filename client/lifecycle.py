@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Coalesce
+from .mail import MAIL_QUEUE_MAX_ATTEMPTS
+from .models import Report, Prediction, ArchivedPrediction, Feedback, Notification, OutboundEmail
+from .outbox import DISPATCH_MAX_ATTEMPTS
+from .signals import publish_reports
+
+REPORT_EXPIRY_HOURS = getattr(settings, 'REPORT_EXPIRY_HOURS', 24)
+PREDICTION_RETENTION_DAYS = getattr(settings, 'PREDICTION_RETENTION_DAYS', 7)
+# Sent notifications are only read again by the SSE Last-Event-ID replay, and
+# sent mail only holds links that expire within the hour.
+NOTIFICATION_RETENTION_HOURS = getattr(settings, 'NOTIFICATION_RETENTION_HOURS', 6)
+MAIL_RETENTION_HOURS = getattr(settings, 'MAIL_RETENTION_HOURS', 24)
+LIFECYCLE_BATCH_SIZE = getattr(settings, 'LIFECYCLE_BATCH_SIZE', 1000)
+EXPIRED = 'expired'
+
+# Create your lifecycle rules here.
+def live_reports(queryset=None):
+	# Expiry is applied lazily on read as well, so results never depend on how
+	# recently expire_reports() ran.
+	queryset = Report.objects.all() if queryset is None else queryset
+	return queryset.exclude(status=EXPIRED).filter(timestamp__gte=datetime.now() - timedelta(hours=REPORT_EXPIRY_HOURS))
+
+def _prediction_cutoff():
+	return datetime.now() - timedelta(days=PREDICTION_RETENTION_DAYS)
+
+def live_predictions(queryset=None):
+	# Predictions without valid_until stay live for the retention window from
+	# their timestamp, the same window after which they are archived.
+	queryset = Prediction.objects.all() if queryset is None else queryset
+	return queryset.filter(
+		Q(valid_until__gte=datetime.now()) | Q(valid_until__isnull=True, timestamp__gte=_prediction_cutoff()),
+	)
+
+def expire_reports(batch_size=LIFECYCLE_BATCH_SIZE):
+	# Walks the partial index of non-expired reports from the oldest end, so
+	# each batch only touches rows that still need the transition.
+	cutoff = datetime.now() - timedelta(hours=REPORT_EXPIRY_HOURS)
+	with transaction.atomic():
+		ids = list(Report.objects.select_for_update(skip_locked=True).exclude(status=EXPIRED).filter(
+			timestamp__lt=cutoff,
+		).order_by('timestamp').values_list('id', flat=True)[:batch_size])
+		if not ids:
+			return 0
+		Report.objects.filter(id__in=ids).update(status=EXPIRED, last_modified=datetime.now())
+		# update() skips post_save, so subscribers are told here.
+		publish_reports(list(Report.objects.select_related('user').filter(id__in=ids).order_by('last_modified', 'id')))
+	return len(ids)
+
+def archive_predictions(batch_size=LIFECYCLE_BATCH_SIZE):
+	# Predictions past their validity by more than the retention window move to
+	# the archive table; those without valid_until count from their timestamp.
+	# Those with feedback stay put: deleting them would cascade to the
+	# feedback rows.
+	cutoff = _prediction_cutoff()
+	with transaction.atomic():
+		predictions = list(Prediction.objects.select_for_update(skip_locked=True).filter(
+			Q(valid_until__lt=cutoff) | Q(valid_until__isnull=True, timestamp__lt=cutoff),
+		).exclude(
+			Exists(Feedback.objects.filter(prediction=OuterRef('pk'))),
+		).order_by(Coalesce('valid_until', 'timestamp'))[:batch_size])
+		if not predictions:
+			return 0
+		ArchivedPrediction.objects.bulk_create([ArchivedPrediction(
+			id=prediction.id,
+			predicted_event=prediction.predicted_event,
+			generated_text=prediction.generated_text,
+			confidence_score=prediction.confidence_score,
+			valid_until=prediction.valid_until,
+			ai_model_version=prediction.ai_model_version,
+			timestamp=prediction.timestamp,
+			user_id=prediction.user_id,
+			report_id=prediction.report_id,
+			source_id=prediction.source_id,
+		) for prediction in predictions], ignore_conflicts=True)
+		Prediction.objects.filter(id__in=[prediction.id for prediction in predictions]).delete()
+	return len(predictions)
+
+def _prune(model, max_attempts, cutoff, batch_size):
+	# Sent rows and rows that ran out of attempts, oldest first through the
+	# timestamp index; rows still waiting to go out are never touched.
+	ids = list(model.objects.filter(
+		Q(sent_at__isnull=False) | Q(attempts__gte=max_attempts),
+		timestamp__lt=cutoff,
+	).order_by('timestamp').values_list('id', flat=True)[:batch_size])
+	if ids:
+		model.objects.filter(id__in=ids).delete()
+	return len(ids)
+
+def prune_notifications(batch_size=LIFECYCLE_BATCH_SIZE):
+	# A stream that reconnects after more than NOTIFICATION_RETENTION_HOURS
+	# replays only what is left; replay is capped at SSE_REPLAY_LIMIT anyway.
+	cutoff = datetime.now() - timedelta(hours=NOTIFICATION_RETENTION_HOURS)
+	return _prune(Notification, DISPATCH_MAX_ATTEMPTS, cutoff, batch_size)
+
+def prune_mail(batch_size=LIFECYCLE_BATCH_SIZE):
+	cutoff = datetime.now() - timedelta(hours=MAIL_RETENTION_HOURS)
+	return _prune(OutboundEmail, MAIL_QUEUE_MAX_ATTEMPTS, cutoff, batch_size)
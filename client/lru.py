@@ -0,0 +1,43 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Create your caches here.
+class LRUCache:
+	def __init__(self, maxsize=1024, ttl=None):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key, default=None):
+		with self._lock:
+			item = self._data.get(key)
+			if item is None:
+				return default
+			value, expires = item
+			if expires is not None and expires <= time.monotonic():
+				del self._data[key]
+				return default
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key, value, ttl=None):
+		ttl = self.ttl if ttl is None else ttl
+		expires = time.monotonic() + ttl if ttl is not None else None
+		with self._lock:
+			self._data[key] = (value, expires)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def delete(self, key):
+		with self._lock:
+			self._data.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._data.clear()
+
+	def __len__(self):
+		return len(self._data)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from .models import OutboundEmail
+
+MAIL_QUEUE_BATCH_SIZE = getattr(settings, 'MAIL_QUEUE_BATCH_SIZE', 50)
+MAIL_QUEUE_MAX_ATTEMPTS = getattr(settings, 'MAIL_QUEUE_MAX_ATTEMPTS', 5)
+MAIL_QUEUE_RETRY_DELAY = getattr(settings, 'MAIL_QUEUE_RETRY_DELAY', 30)
+
+# Create your mail queue here.
+def enqueue_mail(subject, message, from_email, recipient_list):
+	return OutboundEmail.objects.create(subject=subject, body=message, from_email=from_email, recipients=list(recipient_list))
+
+def _retry(email, error):
+	email.attempts += 1
+	email.last_error = str(error)
+	email.available_at = datetime.now() + timedelta(seconds=MAIL_QUEUE_RETRY_DELAY * 2 ** email.attempts)
+
+def send_queued_mail(batch_size=MAIL_QUEUE_BATCH_SIZE, connection=None):
+	with transaction.atomic():
+		emails = list(OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+			sent_at__isnull=True,
+			available_at__lte=datetime.now(),
+			attempts__lt=MAIL_QUEUE_MAX_ATTEMPTS,
+		).order_by('available_at', 'id')[:batch_size])
+		if not emails:
+			return 0
+		# One connection (one SMTP handshake) for the whole batch; each message
+		# is still sent on its own so a rejected recipient only fails that row.
+		connection = connection or get_connection()
+		try:
+			connection.open()
+		except Exception as e:
+			# The server is unreachable: the whole batch backs off instead of
+			# the error taking the mailer down and retrying it in a loop.
+			for email in emails:
+				_retry(email, e)
+		else:
+			try:
+				for email in emails:
+					try:
+						EmailMessage(email.subject, email.body, email.from_email, email.recipients, connection=connection).send()
+					except Exception as e:
+						_retry(email, e)
+					else:
+						email.sent_at = datetime.now()
+			finally:
+				connection.close()
+		OutboundEmail.objects.bulk_update(emails, ['attempts', 'last_error', 'available_at', 'sent_at'])
+	return len(emails)
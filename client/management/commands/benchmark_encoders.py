@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from client.encoders import REPORT_ENCODER, PREDICTION_ENCODER, FEEDBACK_ENCODER, dumps, packb
+from client.models import Report, Prediction, Feedback
+from client.serializers import ReportSerializer, PredictionSerializer, FeedbackSerializer
+
+class Command(BaseCommand):
+	help = 'Compare list encoding throughput of the DRF serializers and the .values() encoders, and the socket wire formats'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--rows', type=int, default=5000)
+		parser.add_argument('--repeat', type=int, default=5)
+		parser.add_argument('--frame-size', type=int, default=100, help='Reports per socket frame')
+
+	def handle(self, *args, **options):
+		rows, repeat = options['rows'], options['repeat']
+		# Fixture rows live in a transaction that is always rolled back.
+		with transaction.atomic():
+			self.create_rows(rows)
+			cases = [
+				('reports', Report, ReportSerializer, REPORT_ENCODER),
+				('predictions', Prediction, PredictionSerializer, PREDICTION_ENCODER),
+				('feedbacks', Feedback, FeedbackSerializer, FEEDBACK_ENCODER),
+			]
+			for name, model, serializer_class, encoder in cases:
+				queryset = model.objects.order_by('-id')[:rows]
+				before = self.measure(repeat, lambda: JSONRenderer().render(serializer_class(queryset.all(), many=True).data))
+				after = self.measure(repeat, lambda: dumps(encoder.encode_many(encoder.values(queryset.all()))))
+				self.stdout.write(f'{name:<12} serializer {rows / before:>10,.0f} rows/s   encoder {rows / after:>10,.0f} rows/s   x{before / after:.1f}')
+			self.wire_formats(options['frame_size'], repeat)
+			transaction.set_rollback(True)
+
+	def wire_formats(self, frame_size, repeat):
+		# Encoding the rows is part of the frame cost: each format encodes
+		# them its own way, as the consumers do.
+		rows = list(REPORT_ENCODER.values(Report.objects.order_by('-id')[:frame_size]))
+		cursor = 'WyIyMDI2LTEwLTE4VDA3OjAwOjAwIiwgMV0'
+		formats = (
+			('json', lambda: dumps({'type': 'snapshot', 'reports': REPORT_ENCODER.encode_many(rows), 'cursor': cursor}).encode()),
+			('msgpack', lambda: packb({'type': 'snapshot', 'reports': REPORT_ENCODER.encode_many_compact(rows), 'cursor': cursor})),
+		)
+		for name, encode in formats:
+			size = len(encode())
+			elapsed = self.measure(repeat * 20, encode)
+			self.stdout.write(f'{name:<12} {size / frame_size:>8.1f} bytes/report   {elapsed * 1e6:>8.0f} us/frame of {frame_size}')
+
+	def measure(self, repeat, run):
+		run()
+		start = time.perf_counter()
+		for _ in range(repeat):
+			run()
+		return (time.perf_counter() - start) / repeat
+
+	def create_rows(self, rows):
+		user = User.objects.create(username=f'benchmark-{time.time_ns()}')
+		now = datetime.now()
+		reports = []
+		for i in range(rows):
+			report = Report(
+				latitude=40.7, longitude=-74.0, report_type='traffic', description='Slow traffic near the bridge',
+				status='pending', sensor_data={'speed': i % 80, 'cars': i % 50}, rating=i % 5, user=user,
+				timestamp=now - timedelta(seconds=i))
+			report.update_derived_fields()
+			reports.append(report)
+		Report.objects.bulk_create(reports, batch_size=1000)
+		predictions = Prediction.objects.bulk_create([Prediction(
+			predicted_event='congestion', generated_text='Expect congestion for the next hour', confidence_score=0.8,
+			valid_until=now + timedelta(hours=1), report=report, user=user) for report in reports], batch_size=1000)
+		Feedback.objects.bulk_create([Feedback(
+			rating=4, comment='Accurate', is_accurate=True, prediction=prediction, user=user,
+			path='', root=None) for prediction in predictions], batch_size=1000)
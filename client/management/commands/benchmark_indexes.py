@@ -0,0 +1,89 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from client.consumers import PREDICTION_SNAPSHOT_SIZE
+from client.encoders import PREDICTION_ENCODER, FEEDBACK_ENCODER
+from client.lifecycle import live_predictions
+from client.models import Report, Prediction, Feedback
+
+# Single-column indexes the index audit (migration 0011) dropped.
+LEGACY_INDEXES = (
+	(Report, ('description', 'latitude', 'longitude', 'rating', 'report_type', 'sensor_data', 'status', 'timestamp', 'verification_status')),
+	(Prediction, ('ai_model_version', 'confidence_score', 'generated_text', 'predicted_event', 'timestamp', 'valid_until')),
+	(Feedback, ('comment', 'is_accurate', 'rating', 'timestamp', 'parent_feedback', 'prediction', 'report')),
+)
+
+class Command(BaseCommand):
+	help = 'Measure report, prediction and feedback inserts and the prediction and feedback reads with the current indexes, or with the pre-audit ones added back'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--rows', type=int, default=20000, help='Reports, each with one prediction and two feedbacks')
+		parser.add_argument('--repeat', type=int, default=20)
+		parser.add_argument('--legacy', action='store_true', help='Add back the single-column indexes dropped by the audit first')
+		parser.add_argument('--seed', type=int, default=1)
+
+	def handle(self, *args, **options):
+		rng = random.Random(options['seed'])
+		# Fixture rows (and legacy indexes) live in a transaction that is always
+		# rolled back.
+		with transaction.atomic():
+			if options['legacy']:
+				self.add_legacy_indexes()
+			reports, predictions = self.insert(options['rows'], rng)
+			self.query('live predictions', options['repeat'], lambda: list(
+				PREDICTION_ENCODER.values(live_predictions().order_by('-timestamp', '-id'))[:PREDICTION_SNAPSHOT_SIZE]))
+			self.query('prediction feedback', options['repeat'], lambda: list(
+				FEEDBACK_ENCODER.values(Feedback.objects.filter(prediction=rng.choice(predictions)).order_by('timestamp'))))
+			self.query('report feedback', options['repeat'], lambda: list(
+				FEEDBACK_ENCODER.values(Feedback.objects.filter(report=rng.choice(reports)).order_by('timestamp'))))
+			transaction.set_rollback(True)
+
+	def add_legacy_indexes(self):
+		# The editor only renders the DDL: SQLite refuses to enter it inside
+		# atomic(), while the statements themselves roll back on both backends.
+		schema_editor = connection.schema_editor()
+		with connection.cursor() as cursor:
+			for model, fields in LEGACY_INDEXES:
+				for field in fields:
+					index = models.Index(fields=[field], name=f'bench_{model._meta.model_name[:4]}_{field}'[:30])
+					cursor.execute(str(index.create_sql(model, schema_editor)))
+
+	def insert(self, rows, rng):
+		user = User.objects.create(username=f'benchmark-{time.time_ns()}')
+		now = datetime.now()
+		reports = []
+		for i in range(rows):
+			report = Report(
+				latitude=round(rng.uniform(40.0, 41.0), 6), longitude=round(rng.uniform(-74.0, -73.0), 6),
+				report_type=rng.choice(('traffic', 'noise', 'crowd')), description='Heavy traffic near the bridge',
+				sensor_data={'noise_db': rng.randint(40, 90)}, rating=rng.randint(1, 5), status='pending',
+				user=user, timestamp=now - timedelta(seconds=i))
+			report.update_derived_fields()
+			reports.append(report)
+		reports = self.measure('reports', reports)
+		predictions = self.measure('predictions', [Prediction(
+			report=report, predicted_event='Traffic congestion', generated_text='Traffic congestion likely near the bridge',
+			confidence_score=rng.random(), valid_until=now + timedelta(minutes=rng.randint(-1440, 1440)),
+			ai_model_version='benchmark', user=user, timestamp=report.timestamp,
+		) for report in reports])
+		self.measure('feedbacks', [Feedback(
+			prediction=prediction, report=prediction.report, rating=rng.randint(1, 5), is_accurate=rng.random() < 0.5,
+			comment='Spot on', user=user, timestamp=now - timedelta(seconds=rng.randint(0, 86400)),
+		) for prediction in predictions for _ in range(2)])
+		return [report.id for report in reports], [prediction.id for prediction in predictions]
+
+	def measure(self, name, objects):
+		start = time.perf_counter()
+		created = objects[0]._meta.model.objects.bulk_create(objects, batch_size=1000)
+		elapsed = time.perf_counter() - start
+		self.stdout.write(f'insert {name:<20} {len(objects) / elapsed:>10,.0f} rows/s')
+		return created
+
+	def query(self, name, repeat, run):
+		start = time.perf_counter()
+		for _ in range(repeat):
+			run()
+		self.stdout.write(f'query  {name:<20} {(time.perf_counter() - start) / repeat * 1000:>10.1f} ms')
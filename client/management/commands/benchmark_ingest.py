@@ -0,0 +1,49 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+class Command(BaseCommand):
+	help = 'Compare report ingestion one row per request through /api/submit-report/ with one request to /api/submit-reports/'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--rows', type=int, default=1000)
+		parser.add_argument('--seed', type=int, default=1)
+
+	def handle(self, *args, **options):
+		rows = self.make_rows(options['rows'], random.Random(options['seed']))
+		cases = (
+			('one row per request', lambda client: [client.post('/api/submit-report/', row, format='json') for row in rows]),
+			('one bulk request', lambda client: [client.post('/api/submit-reports/', rows, format='json')]),
+		)
+		for name, run in cases:
+			# Each case starts from the same table and is rolled back.
+			with transaction.atomic():
+				user = User.objects.create(username=f'benchmark-{time.time_ns()}')
+				client = APIClient()
+				client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+				start = time.perf_counter()
+				responses = run(client)
+				elapsed = time.perf_counter() - start
+				failed = [response.status_code for response in responses if response.status_code >= 300]
+				if failed:
+					raise CommandError(f'{name}: {len(failed)} requests failed, e.g. HTTP {failed[0]}')
+				self.stdout.write(f'{name:<20} {len(rows) / elapsed:>10,.0f} rows/s   {elapsed:>6.2f}s')
+				transaction.set_rollback(True)
+
+	def make_rows(self, rows, rng):
+		# Spread over a wide area and a day, so few rows cluster as duplicates.
+		now = datetime.now()
+		return [{
+			'latitude': round(rng.uniform(40.0, 41.0), 6),
+			'longitude': round(rng.uniform(-74.0, -73.0), 6),
+			'report_type': rng.choice(('traffic', 'noise', 'crowd')),
+			'description': 'Gateway reading',
+			'sensor_data': {'noise_db': rng.randint(40, 90)},
+			'rating': rng.randint(1, 5),
+			'timestamp': (now - timedelta(seconds=rng.randint(0, 86400))).isoformat(),
+		} for _ in range(rows)]
@@ -0,0 +1,65 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from client.geo import bbox_q, haversine, in_bbox, radius_bbox
+from client.models import Report
+
+class Command(BaseCommand):
+	help = 'Compare radius lookups through the geocell ranges with a plain latitude/longitude range filter'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--rows', type=int, default=200000)
+		parser.add_argument('--repeat', type=int, default=20)
+		parser.add_argument('--radius', type=float, default=1000, help='Metres')
+		parser.add_argument('--seed', type=int, default=1)
+
+	def handle(self, *args, **options):
+		# Fixture rows live in a transaction that is always rolled back.
+		with transaction.atomic():
+			self.create_rows(options['rows'], random.Random(options['seed']))
+			center = (40.5, -73.5)
+			box = radius_bbox(*center, options['radius'])
+			cases = (
+				('geocell', lambda: Report.objects.filter(bbox_q(*box))),
+				('lat/lng', lambda: Report.objects.filter(
+					latitude__gte=box[0], latitude__lte=box[2], longitude__gte=box[1], longitude__lte=box[3])),
+			)
+			for name, queryset in cases:
+				matches, candidates = self.lookup(queryset(), center, box, options['radius'])
+				elapsed = self.measure(options['repeat'], lambda: self.lookup(queryset(), center, box, options['radius']))
+				self.stdout.write(f'{name:<8} {elapsed * 1000:>8.1f} ms   {candidates:>8,} candidates   {matches:>6,} matches')
+			transaction.set_rollback(True)
+
+	def lookup(self, queryset, center, box, radius):
+		# The refinement nearby_reports() applies to the candidate rows.
+		candidates = list(queryset.values_list('latitude', 'longitude'))
+		matches = sum(
+			1 for latitude, longitude in candidates
+			if in_bbox(latitude, longitude, *box) and haversine(*center, latitude, longitude) <= radius
+		)
+		return matches, len(candidates)
+
+	def measure(self, repeat, run):
+		start = time.perf_counter()
+		for _ in range(repeat):
+			run()
+		return (time.perf_counter() - start) / repeat
+
+	def create_rows(self, rows, rng):
+		# Reports spread uniformly over a 1 x 1 degree box around the center.
+		user = User.objects.create(username=f'benchmark-{time.time_ns()}')
+		now = datetime.now()
+		reports = []
+		for i in range(rows):
+			report = Report(
+				latitude=round(rng.uniform(40.0, 41.0), 6), longitude=round(rng.uniform(-74.0, -73.0), 6),
+				report_type='traffic', status='pending', user=user, timestamp=now - timedelta(seconds=i))
+			report.update_derived_fields()
+			reports.append(report)
+			if len(reports) >= 5000:
+				Report.objects.bulk_create(reports)
+				reports = []
+		Report.objects.bulk_create(reports)
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import zlib
+from channels.layers import InMemoryChannelLayer, channel_layers
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from client.consumers import NotificationConsumer
+from client.notifications import cell_group
+from client.geo import geohash
+
+class Command(BaseCommand):
+	help = 'Send a burst of notifications through NotificationConsumer and count the frames and bytes a client receives'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--events', type=int, default=200)
+		parser.add_argument('--batch-size', type=int, default=NotificationConsumer.batch_size)
+		parser.add_argument('--window', type=int, default=NotificationConsumer.batch_window, help='Coalescing window in ms')
+
+	def handle(self, *args, **options):
+		events = options['events']
+		modes = (
+			('single', 1, 0),
+			('coalesced', options['batch_size'], options['window']),
+		)
+		for name, batch_size, window in modes:
+			for wire in ('json', 'msgpack'):
+				frames, raw, deflated, elapsed = asyncio.run(self.burst(events, batch_size, window, wire))
+				self.stdout.write(
+					f'{name:<10} {wire:<8} {frames:>6} frames   {raw:>9,} bytes   {deflated:>9,} deflated   '
+					f'{events / elapsed:>10,.0f} events/s')
+
+	async def burst(self, events, batch_size, window, wire):
+		# A private in-memory layer sized for the whole burst, so nothing is
+		# dropped for capacity and no Redis is needed.
+		channel_layer = InMemoryChannelLayer(capacity=events + 1)
+		channel_layers.set('burst', channel_layer)
+		consumer = type('BurstConsumer', (NotificationConsumer,), {
+			'batch_size': batch_size, 'batch_window': window, 'channel_layer_alias': 'burst',
+		})
+		latitude, longitude = 40.7, -74.0
+		communicator = WebsocketCommunicator(
+			consumer.as_asgi(), f'/ws/notifications/?latitude={latitude}&longitude={longitude}&format={wire}&batch=1')
+		connected, _ = await communicator.connect()
+		if not connected:
+			raise RuntimeError('Notification socket refused the connection')
+		group = cell_group(geohash(latitude, longitude, 4))
+		start = time.perf_counter()
+		for i in range(events):
+			await channel_layer.group_send(group, {'type': 'send_notification', 'id': i, 'message': {
+				'id': i, 'predicted_event': 'congestion', 'generated_text': 'Expect congestion for the next hour',
+				'confidence_score': 0.8, 'valid_until': '2026-10-18T08:00:00Z', 'report': i, 'user': 1,
+			}})
+		# permessage-deflate with context takeover: one compressor for the
+		# whole connection, flushed at every message boundary.
+		compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+		frames = raw = deflated = received = 0
+		while received < events:
+			output = await communicator.receive_output(timeout=1 + window / 1000)
+			payload = output.get('bytes') or output.get('text', '').encode()
+			data = consumer().decode(output.get('text'), output.get('bytes'))
+			received += len(data.get('notifications') or data.get('ns') or [None])
+			frames += 1
+			raw += len(payload)
+			deflated += len(compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+		elapsed = time.perf_counter() - start
+		await communicator.disconnect()
+		return frames, raw, deflated, elapsed
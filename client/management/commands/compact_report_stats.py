@@ -0,0 +1,25 @@
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from client.stats import rebuild_report_stats
+
+class Command(BaseCommand):
+	help = 'Recompute the hourly report statistics rollup from the reports table'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--hours', type=int, default=48, help='How many trailing hours to recompute')
+		parser.add_argument('--interval', type=float, help='Keep running, recomputing every this many seconds')
+		parser.add_argument('--all', action='store_true', help='Recompute the whole history, then exit')
+
+	def handle(self, *args, **options):
+		if options['all']:
+			rows = rebuild_report_stats()
+			self.stdout.write(f'Rebuilt {rows} report statistics rows')
+			return
+		while True:
+			end = datetime.now() + timedelta(hours=1)
+			rows = rebuild_report_stats(end - timedelta(hours=options['hours'] + 1), end)
+			self.stdout.write(f'Rebuilt {rows} report statistics rows')
+			if options['interval'] is None:
+				break
+			time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from client.outbox import Dispatcher, DISPATCH_BATCH_SIZE, DISPATCH_MAX_IN_FLIGHT
+
+class Command(BaseCommand):
+	help = 'Publish queued notifications from the outbox to the channel layer'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=DISPATCH_BATCH_SIZE)
+		parser.add_argument('--max-in-flight', type=int, default=DISPATCH_MAX_IN_FLIGHT)
+		parser.add_argument('--interval', type=float, default=0.5, help='Seconds to sleep when the outbox is drained')
+		parser.add_argument('--once', action='store_true', help='Dispatch until the outbox is drained, then exit')
+
+	def handle(self, *args, **options):
+		dispatcher = Dispatcher(batch_size=options['batch_size'], max_in_flight=options['max_in_flight'])
+		while True:
+			dispatched = dispatcher.dispatch_batch()
+			if dispatched:
+				self.stdout.write(f'Dispatched {dispatched} notifications')
+			if dispatched < options['batch_size']:
+				if options['once']:
+					break
+				time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from client.predictions import PredictionWorker, PREDICTOR, PREDICTION_BATCH_SIZE, PREDICTION_WORKERS, PREDICTION_MEMO_SIZE
+
+class Command(BaseCommand):
+	help = 'Generate predictions for new reports with the configured predictor'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--predictor', default=PREDICTOR, help='Dotted path of the predictor class')
+		parser.add_argument('--batch-size', type=int, default=PREDICTION_BATCH_SIZE)
+		parser.add_argument('--workers', type=int, default=PREDICTION_WORKERS, help='Predictor processes; 0 predicts in this process')
+		parser.add_argument('--memo-size', type=int, default=PREDICTION_MEMO_SIZE, help='Memoized signatures to keep; 0 predicts every report')
+		parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when every live report has a prediction')
+		parser.add_argument('--once', action='store_true', help='Predict until every live report has a prediction, then exit')
+
+	def hit_rate(self, worker):
+		if worker.hit_rate is None:
+			return ''
+		return f', memo hit rate {worker.hit_rate:.1%} of {worker.hits + worker.misses}'
+
+	def handle(self, *args, **options):
+		total, started = 0, time.perf_counter()
+		with PredictionWorker(options['predictor'], batch_size=options['batch_size'], workers=options['workers'], memo_size=options['memo_size']) as worker:
+			while True:
+				start = time.perf_counter()
+				generated = worker.generate_batch()
+				total += generated
+				if generated:
+					self.stdout.write(f'Generated {generated} {worker.version} predictions ({generated / (time.perf_counter() - start):,.0f} reports/s{self.hit_rate(worker)})')
+				if generated < options['batch_size']:
+					if options['once']:
+						break
+					time.sleep(options['interval'])
+		if total:
+			self.stdout.write(f'Generated {total} predictions in {time.perf_counter() - started:.1f}s ({total / (time.perf_counter() - started):,.0f} reports/s{self.hit_rate(worker)})')
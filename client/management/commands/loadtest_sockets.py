@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import os
+import resource
+import statistics
+import struct
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+	help = 'Open many concurrent websockets against a running server and report how many were served and how fast'
+
+	def add_arguments(self, parser):
+		parser.add_argument('url', help='e.g. ws://127.0.0.1:8000/ws/reports/')
+		parser.add_argument('--connections', type=int, default=2000)
+		parser.add_argument('--hold', type=float, default=5, help='Seconds each socket stays open after its reply')
+		parser.add_argument('--timeout', type=float, default=30, help='Seconds a socket waits for its first reply')
+		parser.add_argument('--message', default='{}', help='Text frame sent once the socket is open')
+
+	def handle(self, *args, **options):
+		url = urlsplit(options['url'])
+		if url.scheme != 'ws' or not url.hostname:
+			raise CommandError('Only plain ws:// URLs are supported')
+		# Every socket is a file descriptor on this side too.
+		soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+		wanted = options['connections'] + 64
+		if soft != resource.RLIM_INFINITY and soft < wanted:
+			resource.setrlimit(resource.RLIMIT_NOFILE, (wanted if hard == resource.RLIM_INFINITY else min(hard, wanted), hard))
+		start = time.perf_counter()
+		results = asyncio.run(self.run(url, options))
+		elapsed = time.perf_counter() - start
+		latencies = sorted(result for result in results if isinstance(result, float))
+		failures = {}
+		for result in results:
+			if not isinstance(result, float):
+				failures[result] = failures.get(result, 0) + 1
+		self.stdout.write(f'{len(latencies)}/{len(results)} sockets replied in {elapsed:.1f}s')
+		if latencies:
+			self.stdout.write(
+				f'first reply p50 {statistics.median(latencies):.2f}s   '
+				f'p95 {latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0]:.2f}s   '
+				f'max {latencies[-1]:.2f}s')
+		for reason, count in sorted(failures.items()):
+			self.stdout.write(f'{count} {reason}')
+
+	async def run(self, url, options):
+		return await asyncio.gather(*(self.client(url, options) for _ in range(options['connections'])))
+
+	async def client(self, url, options):
+		# Returns the seconds until the first frame arrived, or why none did.
+		start = time.perf_counter()
+		writer = None
+		try:
+			reader, writer = await asyncio.wait_for(asyncio.open_connection(url.hostname, url.port or 80), options['timeout'])
+			await self.handshake(reader, writer, url)
+			writer.write(self.frame(options['message'].encode()))
+			await asyncio.wait_for(self.read_frame(reader), options['timeout'] - (time.perf_counter() - start))
+			latency = time.perf_counter() - start
+			await asyncio.sleep(options['hold'])
+			writer.write(self.frame(struct.pack('!H', 1000), opcode=0x8))
+			return latency
+		except asyncio.TimeoutError:
+			return 'timed out'
+		except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+			return f'{type(e).__name__}: {e}' if str(e) else type(e).__name__
+		finally:
+			if writer is not None:
+				writer.close()
+
+	async def handshake(self, reader, writer, url):
+		path = (url.path or '/') + (f'?{url.query}' if url.query else '')
+		key = base64.b64encode(os.urandom(16)).decode()
+		writer.write((
+			f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+			f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n'
+		).encode())
+		response = await reader.readuntil(b'\r\n\r\n')
+		if not response.startswith(b'HTTP/1.1 101'):
+			raise ValueError(response.split(b'\r\n', 1)[0].decode(errors='replace'))
+
+	def frame(self, payload, opcode=0x1):
+		# Client frames must be masked.
+		mask = os.urandom(4)
+		length = len(payload)
+		if length < 126:
+			header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+		elif length < 1 << 16:
+			header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+		else:
+			header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+		return header + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+	async def read_frame(self, reader):
+		first, second = await reader.readexactly(2)
+		length = second & 0x7F
+		if length == 126:
+			length, = struct.unpack('!H', await reader.readexactly(2))
+		elif length == 127:
+			length, = struct.unpack('!Q', await reader.readexactly(8))
+		payload = await reader.readexactly(length)
+		if first & 0x0F == 0x8:
+			raise ConnectionError('closed by server')
+		return payload
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from client.scoring import refresh_model_metrics, rebuild_model_metrics, SCORING_BATCH_SIZE
+
+class Command(BaseCommand):
+	help = 'Fold new prediction feedback into the per-model accuracy, Brier score and calibration totals'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=SCORING_BATCH_SIZE)
+		parser.add_argument('--interval', type=float, default=300, help='Seconds to sleep once everything is up to date')
+		parser.add_argument('--once', action='store_true', help='Run until everything is up to date, then exit')
+		parser.add_argument('--all', action='store_true', help='Recount all feedback from scratch, then exit')
+
+	def handle(self, *args, **options):
+		if options['all']:
+			rows = rebuild_model_metrics(batch_size=options['batch_size'])
+			self.stdout.write(f'Scored {rows} feedback rows')
+			return
+		while True:
+			start = time.perf_counter()
+			rows = refresh_model_metrics(batch_size=options['batch_size'])
+			if rows:
+				self.stdout.write(f'Scored {rows} feedback rows ({rows / (time.perf_counter() - start):,.0f} rows/s)')
+			if rows < options['batch_size']:
+				if options['once']:
+					break
+				time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from client.lifecycle import expire_reports, archive_predictions, prune_notifications, prune_mail, LIFECYCLE_BATCH_SIZE
+
+class Command(BaseCommand):
+	help = 'Expire stale reports, archive old predictions and prune sent notifications and mail in bounded batches'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=LIFECYCLE_BATCH_SIZE)
+		parser.add_argument('--interval', type=float, default=300, help='Seconds to sleep once everything is up to date')
+		parser.add_argument('--once', action='store_true', help='Run until everything is up to date, then exit')
+
+	def handle(self, *args, **options):
+		while True:
+			expired = expire_reports(batch_size=options['batch_size'])
+			archived = archive_predictions(batch_size=options['batch_size'])
+			notifications = prune_notifications(batch_size=options['batch_size'])
+			emails = prune_mail(batch_size=options['batch_size'])
+			if expired or archived or notifications or emails:
+				self.stdout.write(
+					f'Expired {expired} reports, archived {archived} predictions, '
+					f'pruned {notifications} notifications and {emails} emails')
+			if max(expired, archived, notifications, emails) < options['batch_size']:
+				if options['once']:
+					break
+				time.sleep(options['interval'])
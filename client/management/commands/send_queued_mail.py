@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from client.mail import send_queued_mail, MAIL_QUEUE_BATCH_SIZE
+
+class Command(BaseCommand):
+	help = 'Send queued outbound email in batches over a reused connection'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=MAIL_QUEUE_BATCH_SIZE)
+		parser.add_argument('--interval', type=float, default=2, help='Seconds to sleep when the queue is drained')
+		parser.add_argument('--once', action='store_true', help='Send until the queue is drained, then exit')
+
+	def handle(self, *args, **options):
+		while True:
+			sent = send_queued_mail(batch_size=options['batch_size'])
+			if sent:
+				self.stdout.write(f'Processed {sent} emails')
+			if sent < options['batch_size']:
+				if options['once']:
+					break
+				time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0004_feedback_parent_feedback'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='location',
+            field=models.CharField(blank=True, max_length=225, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['-timestamp', '-id'], name='prediction_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['-timestamp', '-id'], name='report_timestamp_id_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# A frozen copy of client.geo.geocell() as of this migration, so the backfill
+# keeps producing the same codes whatever later changes to the app module.
+GEOCELL_BITS = 50
+
+
+def geocell(latitude, longitude):
+    lat_bits = GEOCELL_BITS // 2
+    lng_bits = GEOCELL_BITS - lat_bits
+    lat_index = int((float(latitude) + 90) / 180 * (1 << lat_bits))
+    lng_index = int((float(longitude) + 180) / 360 * (1 << lng_bits))
+    lat_index = min(max(lat_index, 0), (1 << lat_bits) - 1)
+    lng_index = min(max(lng_index, 0), (1 << lng_bits) - 1)
+    code = 0
+    for bit in range(lng_bits - 1, -1, -1):
+        code = (code << 1) | ((lng_index >> bit) & 1)
+        if bit < lat_bits:
+            code = (code << 1) | ((lat_index >> bit) & 1)
+    return code
+
+
+def backfill_geocell(apps, schema_editor):
+    Report = apps.get_model('client', 'Report')
+    reports = []
+    for report in Report.objects.filter(geocell__isnull=True).only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        report.geocell = geocell(report.latitude, report.longitude)
+        reports.append(report)
+        if len(reports) >= 2000:
+            Report.objects.bulk_update(reports, ['geocell'])
+            reports = []
+    Report.objects.bulk_update(reports, ['geocell'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0005_report_location_timestamp_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='geocell',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['geocell', 'timestamp'], name='report_geocell_timestamp_idx'),
+        ),
+        migrations.RunPython(backfill_geocell, migrations.RunPython.noop),
+    ]
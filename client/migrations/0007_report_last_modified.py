@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:12
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_last_modified(apps, schema_editor):
+    Report = apps.get_model('client', 'Report')
+    Report.objects.update(last_modified=models.F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0006_report_geocell'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='last_modified',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['last_modified', 'id'], name='report_last_modified_id_idx'),
+        ),
+        migrations.RunPython(backfill_last_modified, migrations.RunPython.noop),
+    ]
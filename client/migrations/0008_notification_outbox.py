@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:18
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0007_report_last_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=255)),
+                ('event_type', models.CharField(default='send_notification', max_length=255)),
+                ('payload', models.JSONField(default=dict)),
+                ('timestamp', models.DateTimeField(default=datetime.datetime.now)),
+                ('available_at', models.DateTimeField(default=datetime.datetime.now)),
+                ('attempts', models.IntegerField(default=0)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['available_at', 'id'], name='notification_pending_idx')],
+            },
+        ),
+    ]
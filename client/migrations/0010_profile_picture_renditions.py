@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0009_outbound_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_picture_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,173 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:22
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0010_profile_picture_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedback',
+            name='comment',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='is_accurate',
+            field=models.BooleanField(blank=True, default=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='parent_feedback',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='client.feedback'),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='prediction',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feedbacks', to='client.prediction'),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='rating',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='report',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feedbacks', to='client.report'),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='timestamp',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='ai_model_version',
+            field=models.CharField(default='GPT-4', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='confidence_score',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='generated_text',
+            field=models.TextField(),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='predicted_event',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='timestamp',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='valid_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='last_modified',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='location',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='notification_status',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='phone_number',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='timestamp',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='verification_status',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='description',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='latitude',
+            field=models.DecimalField(decimal_places=6, max_digits=9),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='longitude',
+            field=models.DecimalField(decimal_places=6, max_digits=9),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='rating',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='report_type',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='sensor_data',
+            field=models.JSONField(blank=True, default=dict, null=True),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='status',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='timestamp',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='verification_status',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('prediction__isnull', False)), fields=['prediction', 'timestamp'], name='feedback_prediction_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('report__isnull', False)), fields=['report', 'timestamp'], name='feedback_report_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('parent_feedback__isnull', False)), fields=['parent_feedback', 'timestamp'], name='feedback_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['valid_until', '-timestamp'], name='prediction_valid_until_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:05
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+# A frozen copy of the client.search index helpers as of this migration, so
+# the indexes it creates do not follow later changes to the app module.
+SEARCH_CONFIG = 'english'
+SEARCH_FIELDS = {
+    'client_report': ('report_type', 'location', 'description'),
+    'client_prediction': ('predicted_event', 'generated_text'),
+}
+
+
+def search_index(table):
+    return GinIndex(SearchVector(*SEARCH_FIELDS[table], config=SEARCH_CONFIG), name='%s_search_idx' % table[len('client_'):])
+
+
+def create_fts(connection, table):
+    fts, fields = '%s_fts' % table, SEARCH_FIELDS[table]
+    columns = ', '.join(fields)
+    new_values = ', '.join('new.%s' % field for field in fields)
+    old_values = ', '.join('old.%s' % field for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s, content='%s', content_rowid='id', tokenize='porter unicode61')"
+            % (fts, columns, table))
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS %s_insert AFTER INSERT ON %s BEGIN '
+            'INSERT INTO %s(rowid, %s) VALUES (new.id, %s); END'
+            % (fts, table, fts, columns, new_values))
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS %s_delete AFTER DELETE ON %s BEGIN '
+            "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s); END"
+            % (fts, table, fts, fts, columns, old_values))
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS %s_update AFTER UPDATE OF %s ON %s BEGIN '
+            "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s); "
+            'INSERT INTO %s(rowid, %s) VALUES (new.id, %s); END'
+            % (fts, columns, table, fts, fts, columns, old_values, fts, columns, new_values))
+        cursor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (fts, fts))
+
+
+def create_search_index(model, schema_editor):
+    table = model._meta.db_table
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.add_index(model, search_index(table))
+    elif connection.vendor == 'sqlite':
+        create_fts(connection, table)
+
+
+def drop_search_index(model, schema_editor):
+    table = model._meta.db_table
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.remove_index(model, search_index(table))
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for action in ('insert', 'delete', 'update'):
+                cursor.execute('DROP TRIGGER IF EXISTS %s_fts_%s' % (table, action))
+            cursor.execute('DROP TABLE IF EXISTS %s_fts' % table)
+
+
+def create_search_indexes(apps, schema_editor):
+    for model_name in ('Report', 'Prediction'):
+        create_search_index(apps.get_model('client', model_name), schema_editor)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for model_name in ('Report', 'Prediction'):
+        drop_search_index(apps.get_model('client', model_name), schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0011_index_audit'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
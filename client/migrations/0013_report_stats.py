@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0012_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('report_type', models.CharField(max_length=255)),
+                ('cell', models.BigIntegerField()),
+                ('report_count', models.IntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('verified_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'report_type', 'cell'), name='reportstat_bucket_type_cell_key')],
+            },
+        ),
+    ]
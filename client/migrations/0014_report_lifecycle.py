@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:28
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0013_report_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPrediction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('predicted_event', models.CharField(max_length=255)),
+                ('generated_text', models.TextField()),
+                ('confidence_score', models.FloatField()),
+                ('valid_until', models.DateTimeField(blank=True, null=True)),
+                ('ai_model_version', models.CharField(max_length=255)),
+                ('timestamp', models.DateTimeField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('report_id', models.BigIntegerField()),
+                ('archived_at', models.DateTimeField(default=datetime.datetime.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(condition=models.Q(('status', 'expired'), _negated=True), fields=['timestamp'], name='report_live_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_threads(apps, schema_editor):
+    # Parents are always older than their replies, so walking by id sees
+    # every parent before its children.
+    Feedback = apps.get_model('client', 'Feedback')
+    nodes = {}
+    for feedback in Feedback.objects.only('id', 'parent_feedback_id').order_by('id').iterator(chunk_size=2000):
+        parent = nodes.get(feedback.parent_feedback_id)
+        feedback.depth = parent.depth + 1 if parent else 0
+        feedback.root_id = parent.root_id if parent else feedback.id
+        feedback.path = '%s%012d/' % (parent.path if parent else '', feedback.id)
+        feedback.reply_count = 0
+        if parent:
+            parent.reply_count += 1
+        nodes[feedback.id] = feedback
+    Feedback.objects.bulk_update(list(nodes.values()), ['depth', 'root', 'path', 'reply_count'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0014_report_lifecycle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='depth',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='path',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='reply_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='root',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread', to='client.feedback'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['root', 'path'], name='feedback_root_path_idx'),
+        ),
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:43
+
+import math
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# A frozen copy of client.sensors.extract_readings() as of this migration, so
+# the backfill keeps producing the same readings whatever later changes to the
+# app module.
+METRIC_MAX_LENGTH = 64
+
+
+def number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def extract_readings(sensor_data, prefix=''):
+    if not isinstance(sensor_data, dict):
+        return
+    for key, value in sensor_data.items():
+        metric = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from extract_readings(value, f'{metric}.')
+            continue
+        value = number(value)
+        if value is not None and len(metric) <= METRIC_MAX_LENGTH:
+            yield metric, value
+
+
+def backfill_readings(apps, schema_editor):
+    Report = apps.get_model('client', 'Report')
+    SensorReading = apps.get_model('client', 'SensorReading')
+    readings = []
+    for report in Report.objects.exclude(sensor_data__isnull=True).only('id', 'timestamp', 'sensor_data').iterator(chunk_size=2000):
+        readings.extend(
+            SensorReading(report_id=report.id, metric=metric, timestamp=report.timestamp, value=value)
+            for metric, value in extract_readings(report.sensor_data)
+        )
+        if len(readings) >= 2000:
+            SensorReading.objects.bulk_create(readings, ignore_conflicts=True)
+            readings = []
+    SensorReading.objects.bulk_create(readings, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0015_feedback_thread'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorReading',
+            fields=[
+                ('pk', models.CompositePrimaryKey('metric', 'timestamp', 'report', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('metric', models.CharField(max_length=64)),
+                ('timestamp', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='client.report')),
+            ],
+        ),
+        migrations.RunPython(backfill_readings, migrations.RunPython.noop),
+    ]
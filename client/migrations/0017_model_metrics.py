@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:46
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0016_sensor_readings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ai_model_version', models.CharField(max_length=255, unique=True)),
+                ('feedback_count', models.IntegerField(default=0)),
+                ('judged_count', models.IntegerField(default=0)),
+                ('accurate_count', models.IntegerField(default=0)),
+                ('brier_sum', models.FloatField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('calibration', models.JSONField(default=list)),
+                ('last_feedback_id', models.BigIntegerField(default=0)),
+                ('last_modified', models.DateTimeField(default=datetime.datetime.now)),
+            ],
+        ),
+    ]
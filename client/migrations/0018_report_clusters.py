@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:53
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_cluster_cells(apps, schema_editor):
+    # geocell >> 20, i.e. the geohash cell of length 6.
+    Report = apps.get_model('client', 'Report')
+    Report.objects.filter(geocell__isnull=False).update(cluster_cell=models.F('geocell') / (1 << 20))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0017_model_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(max_length=255)),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('first_seen', models.DateTimeField(default=datetime.datetime.now)),
+                ('last_seen', models.DateTimeField(default=datetime.datetime.now)),
+                ('report_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='cluster_cell',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='is_duplicate',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='cluster',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='client.reportcluster'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(condition=models.Q(('is_duplicate', False)), fields=['cluster_cell', 'report_type', 'timestamp'], name='report_cluster_cell_idx'),
+        ),
+        migrations.RunPython(backfill_cluster_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0018_report_clusters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedprediction',
+            name='source_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='source',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reuses', to='client.prediction'),
+        ),
+    ]
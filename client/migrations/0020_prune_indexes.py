@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0019_prediction_source'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['timestamp'], name='notification_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboundemail',
+            index=models.Index(fields=['timestamp'], name='outboundemail_timestamp_idx'),
+        ),
+    ]
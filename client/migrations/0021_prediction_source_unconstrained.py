@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0020_prune_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='prediction',
+            name='source',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='reuses', to='client.prediction'),
+        ),
+    ]
@@ -1,48 +1,217 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from datetime import datetime
 from cloudinary.models import CloudinaryField
+from .geo import geocell, GEOCELL_BITS
+
+# Geohash length of Report.cluster_cell, the grid client/clusters.py looks
+# up earlier reports in.
+CLUSTER_CELL_PRECISION = 6
+CLUSTER_CELL_SHIFT = GEOCELL_BITS - 5 * CLUSTER_CELL_PRECISION
 
 # Create your models here.
 class Profile(models.Model):
-	phone_number = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+	phone_number = models.CharField(max_length=255, blank=True, null=True)
 	profile_picture = CloudinaryField('image', folder='profile-pictures', blank=True, null=True)
-	location = models.CharField(max_length=255, blank=True, null=True, db_index=True)
-	timestamp = models.DateTimeField(default=datetime.now, db_index=True)
-	last_modified = models.DateTimeField(default=datetime.now, db_index=True)
-	verification_status = models.BooleanField(default=False, db_index=True)
-	notification_status = models.BooleanField(default=False, db_index=True)
+	profile_picture_renditions = models.JSONField(default=dict, blank=True)
+	location = models.CharField(max_length=255, blank=True, null=True)
+	timestamp = models.DateTimeField(default=datetime.now)
+	last_modified = models.DateTimeField(default=datetime.now)
+	verification_status = models.BooleanField(default=False)
+	notification_status = models.BooleanField(default=False)
 	user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile', db_index=True)
 
+class ReportCluster(models.Model):
+	# Reports of one incident, see client/clusters.py. The first report stays
+	# the representative; later copies are linked with is_duplicate set.
+	report_type = models.CharField(max_length=255)
+	latitude = models.DecimalField(max_digits=9, decimal_places=6)
+	longitude = models.DecimalField(max_digits=9, decimal_places=6)
+	first_seen = models.DateTimeField(default=datetime.now)
+	last_seen = models.DateTimeField(default=datetime.now)
+	report_count = models.IntegerField(default=0)
+
 class Report(models.Model):
 	location = models.CharField(max_length=225, blank=True, null=True)
-	latitude = models.DecimalField(max_digits=9, decimal_places=6, db_index=True)
-	longitude = models.DecimalField(max_digits=9, decimal_places=6, db_index=True)
-	report_type = models.CharField(max_length=255, db_index=True) # e.g., traffic, noise, crowd level
-	description = models.TextField(blank=True, null=True, db_index=True)
-	timestamp = models.DateTimeField(default=datetime.now, db_index=True)
-	status = models.CharField(max_length=255, db_index=True) # e.g., active, expired
-	sensor_data = models.JSONField(default=dict, blank=True, null=True, db_index=True)
-	verification_status = models.BooleanField(default=False, db_index=True)
-	rating = models.FloatField(blank=True, null=True, db_index=True)
+	latitude = models.DecimalField(max_digits=9, decimal_places=6)
+	longitude = models.DecimalField(max_digits=9, decimal_places=6)
+	report_type = models.CharField(max_length=255) # e.g., traffic, noise, crowd level
+	description = models.TextField(blank=True, null=True)
+	timestamp = models.DateTimeField(default=datetime.now)
+	last_modified = models.DateTimeField(default=datetime.now)
+	status = models.CharField(max_length=255) # e.g., active, expired
+	sensor_data = models.JSONField(default=dict, blank=True, null=True)
+	verification_status = models.BooleanField(default=False)
+	rating = models.FloatField(blank=True, null=True)
+	geocell = models.BigIntegerField(blank=True, null=True, editable=False)
+	cluster_cell = models.BigIntegerField(blank=True, null=True, editable=False)
+	cluster = models.ForeignKey(ReportCluster, on_delete=models.SET_NULL, related_name='reports', blank=True, null=True, editable=False, db_index=True)
+	is_duplicate = models.BooleanField(default=False, editable=False)
 	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports', db_index=True)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=['-timestamp', '-id'], name='report_timestamp_id_idx'),
+			models.Index(fields=['geocell', 'timestamp'], name='report_geocell_timestamp_idx'),
+			models.Index(fields=['last_modified', 'id'], name='report_last_modified_id_idx'),
+			models.Index(fields=['timestamp'], condition=~models.Q(status='expired'), name='report_live_timestamp_idx'),
+			models.Index(fields=['cluster_cell', 'report_type', 'timestamp'], condition=models.Q(is_duplicate=False), name='report_cluster_cell_idx'),
+		]
+
+	def save(self, *args, **kwargs):
+		self.update_derived_fields()
+		super().save(*args, **kwargs)
+
+	def update_derived_fields(self):
+		# Called by save() and explicitly before bulk_create(), which skips save().
+		self.last_modified = datetime.now()
+		if self.latitude is not None and self.longitude is not None:
+			self.geocell = geocell(self.latitude, self.longitude)
+			self.cluster_cell = self.geocell >> CLUSTER_CELL_SHIFT
+
 class Prediction(models.Model):
-	predicted_event = models.CharField(max_length=255, db_index=True)
-	generated_text = models.TextField(db_index=True)
-	confidence_score = models.FloatField(db_index=True) # 0-1 indicating AI confidence
-	valid_until = models.DateTimeField(blank=True, null=True, db_index=True)
-	ai_model_version = models.CharField(max_length=255, default='GPT-4', db_index=True)
-	timestamp = models.DateTimeField(default=datetime.now, db_index=True)
+	predicted_event = models.CharField(max_length=255)
+	generated_text = models.TextField()
+	confidence_score = models.FloatField() # 0-1 indicating AI confidence
+	valid_until = models.DateTimeField(blank=True, null=True)
+	ai_model_version = models.CharField(max_length=255, default='GPT-4')
+	timestamp = models.DateTimeField(default=datetime.now)
 	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='predictions', blank=True, null=True, db_index=True)
 	report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='predictions', db_index=True)
+	# The prediction this one was copied from when client/predictions.py reused
+	# a memoized result for a report with the same feature signature. The id is
+	# kept without a constraint once the original is archived or deleted, so
+	# copies and their archived rows still count as reuse.
+	source = models.ForeignKey('self', on_delete=models.DO_NOTHING, db_constraint=False, related_name='reuses', blank=True, null=True, editable=False, db_index=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['-timestamp', '-id'], name='prediction_timestamp_id_idx'),
+			models.Index(fields=['valid_until', '-timestamp'], name='prediction_valid_until_idx'),
+		]
+
+class ArchivedPrediction(models.Model):
+	# Cold copy of a Prediction moved out by client/lifecycle.py. Keys are kept
+	# as plain columns so archived rows outlive their report and user.
+	id = models.BigIntegerField(primary_key=True)
+	predicted_event = models.CharField(max_length=255)
+	generated_text = models.TextField()
+	confidence_score = models.FloatField()
+	valid_until = models.DateTimeField(blank=True, null=True)
+	ai_model_version = models.CharField(max_length=255)
+	timestamp = models.DateTimeField()
+	user_id = models.BigIntegerField(blank=True, null=True)
+	report_id = models.BigIntegerField()
+	source_id = models.BigIntegerField(blank=True, null=True)
+	archived_at = models.DateTimeField(default=datetime.now)
 
 class Feedback(models.Model):
-	rating = models.IntegerField(null=True, blank=True, db_index=True)
-	comment = models.TextField(null=True, blank=True, db_index=True)
-	is_accurate = models.BooleanField(default=False, null=True, blank=True, db_index=True)
-	timestamp = models.DateTimeField(default=datetime.now, db_index=True)
-	parent_feedback = models.ForeignKey('self', on_delete=models.CASCADE, related_name='replies', blank=True, null=True, db_index=True)
+	rating = models.IntegerField(null=True, blank=True)
+	comment = models.TextField(null=True, blank=True)
+	is_accurate = models.BooleanField(default=False, null=True, blank=True)
+	timestamp = models.DateTimeField(default=datetime.now)
+	parent_feedback = models.ForeignKey('self', on_delete=models.CASCADE, related_name='replies', blank=True, null=True, db_index=False)
+	root = models.ForeignKey('self', on_delete=models.CASCADE, related_name='thread', blank=True, null=True, editable=False, db_index=False)
+	path = models.TextField(blank=True, editable=False) # e.g. 000000000012/000000000047/
+	depth = models.IntegerField(default=0, editable=False)
+	reply_count = models.IntegerField(default=0, editable=False)
 	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feedbacks', blank=True, null=True, db_index=True)
-	prediction = models.ForeignKey(Prediction, on_delete=models.CASCADE, related_name='feedbacks', blank=True, null=True, db_index=True)
-	report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='feedbacks', blank=True, null=True, db_index=True)
+	prediction = models.ForeignKey(Prediction, on_delete=models.CASCADE, related_name='feedbacks', blank=True, null=True, db_index=False)
+	report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='feedbacks', blank=True, null=True, db_index=False)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['prediction', 'timestamp'], condition=models.Q(prediction__isnull=False), name='feedback_prediction_idx'),
+			models.Index(fields=['report', 'timestamp'], condition=models.Q(report__isnull=False), name='feedback_report_idx'),
+			models.Index(fields=['parent_feedback', 'timestamp'], condition=models.Q(parent_feedback__isnull=False), name='feedback_parent_idx'),
+			models.Index(fields=['root', 'path'], name='feedback_root_path_idx'),
+		]
+
+	def save(self, *args, **kwargs):
+		if self.pk is not None:
+			return super().save(*args, **kwargs)
+		# New rows join their thread: the root and materialized path are
+		# inherited from the parent, so a whole (sub)thread is one range scan
+		# on (root, path) in depth-first order.
+		with transaction.atomic():
+			parent = self.parent_feedback
+			if parent is not None:
+				self.depth = parent.depth + 1
+			super().save(*args, **kwargs)
+			self.root_id = parent.root_id if parent is not None else self.pk
+			self.path = '%s%012d/' % (parent.path if parent is not None else '', self.pk)
+			Feedback.objects.filter(pk=self.pk).update(root=self.root_id, path=self.path)
+			if parent is not None:
+				Feedback.objects.filter(pk=parent.pk).update(reply_count=models.F('reply_count') + 1)
+
+class ReportStat(models.Model):
+	# Hourly rollup of reports per type and geohash cell, see client/stats.py.
+	bucket = models.DateTimeField()
+	report_type = models.CharField(max_length=255)
+	cell = models.BigIntegerField()
+	report_count = models.IntegerField(default=0)
+	rating_sum = models.FloatField(default=0)
+	rating_count = models.IntegerField(default=0)
+	verified_count = models.IntegerField(default=0)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['bucket', 'report_type', 'cell'], name='reportstat_bucket_type_cell_key'),
+		]
+
+class Notification(models.Model):
+	group = models.CharField(max_length=255)
+	event_type = models.CharField(max_length=255, default='send_notification')
+	payload = models.JSONField(default=dict)
+	timestamp = models.DateTimeField(default=datetime.now)
+	available_at = models.DateTimeField(default=datetime.now)
+	attempts = models.IntegerField(default=0)
+	sent_at = models.DateTimeField(blank=True, null=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['available_at', 'id'], condition=models.Q(sent_at__isnull=True), name='notification_pending_idx'),
+			models.Index(fields=['timestamp'], name='notification_timestamp_idx'),
+		]
+
+class OutboundEmail(models.Model):
+	subject = models.CharField(max_length=255)
+	body = models.TextField()
+	from_email = models.CharField(max_length=255, blank=True, null=True)
+	recipients = models.JSONField(default=list)
+	timestamp = models.DateTimeField(default=datetime.now)
+	available_at = models.DateTimeField(default=datetime.now)
+	attempts = models.IntegerField(default=0)
+	last_error = models.TextField(blank=True, null=True)
+	sent_at = models.DateTimeField(blank=True, null=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['available_at', 'id'], condition=models.Q(sent_at__isnull=True), name='outboundemail_pending_idx'),
+			models.Index(fields=['timestamp'], name='outboundemail_timestamp_idx'),
+		]
+
+class ModelMetric(models.Model):
+	# Running feedback totals per model version, see client/scoring.py. Only
+	# sums are kept, so each refresh folds in new feedback without rereading
+	# what was already counted.
+	ai_model_version = models.CharField(max_length=255, unique=True)
+	feedback_count = models.IntegerField(default=0)
+	judged_count = models.IntegerField(default=0) # feedback with is_accurate set
+	accurate_count = models.IntegerField(default=0)
+	brier_sum = models.FloatField(default=0)
+	rating_sum = models.FloatField(default=0)
+	rating_count = models.IntegerField(default=0)
+	calibration = models.JSONField(default=list) # per confidence bin: [judged, confidence sum, accurate]
+	last_feedback_id = models.BigIntegerField(default=0)
+	last_modified = models.DateTimeField(default=datetime.now)
+
+class SensorReading(models.Model):
+	# One numeric value pulled out of Report.sensor_data, see client/sensors.py.
+	# The key doubles as the (metric, timestamp) index series queries scan,
+	# so the table carries no surrogate id.
+	pk = models.CompositePrimaryKey('metric', 'timestamp', 'report')
+	metric = models.CharField(max_length=64) # e.g. noise_db, vehicle_count
+	timestamp = models.DateTimeField()
+	value = models.FloatField()
+	report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='readings', db_index=True)
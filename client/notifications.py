@@ -0,0 +1,44 @@
+from django.conf import settings
+from .geo import geohash, neighbours, parse_point
+from .outbox import enqueue_batch, enqueue_many
+
+NOTIFICATION_CELL_PRECISION = getattr(settings, 'NOTIFICATION_CELL_PRECISION', 4)
+
+# Create your notification routing here.
+def user_group(user_id):
+	return f'user-{user_id}'
+
+def cell_group(cell):
+	return f'cell-{cell}'
+
+def subscription_groups(user=None, latitude=None, longitude=None):
+	# Subscribers join their own cell and its neighbours, so a publisher only
+	# ever sends to the single cell of the report and nobody near a cell edge
+	# misses it.
+	profile = getattr(user, 'profile', None) if user is not None else None
+	if profile is not None and not profile.notification_status:
+		return []
+	groups = []
+	if user is not None:
+		groups.append(user_group(user.id))
+	point = None
+	if latitude is not None and longitude is not None:
+		point = parse_point(f'{latitude},{longitude}')
+	elif profile is not None:
+		point = parse_point(profile.location)
+	if point:
+		groups.extend(cell_group(cell) for cell in neighbours(*point, NOTIFICATION_CELL_PRECISION))
+	return groups
+
+def prediction_groups(report):
+	return [
+		cell_group(geohash(report.latitude, report.longitude, NOTIFICATION_CELL_PRECISION)),
+		user_group(report.user_id),
+	]
+
+def notify_prediction(report, payload):
+	return enqueue_many(prediction_groups(report), payload)
+
+def notify_predictions(items):
+	# `items` are (report, payload) pairs, e.g. a batch from generate_predictions.
+	return enqueue_batch((group, payload) for report, payload in items for group in prediction_groups(report))
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from .models import Notification
+
+DISPATCH_BATCH_SIZE = getattr(settings, 'NOTIFICATION_DISPATCH_BATCH_SIZE', 200)
+DISPATCH_MAX_IN_FLIGHT = getattr(settings, 'NOTIFICATION_DISPATCH_MAX_IN_FLIGHT', 50)
+DISPATCH_MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_DISPATCH_MAX_ATTEMPTS', 8)
+DISPATCH_RETRY_DELAY = getattr(settings, 'NOTIFICATION_DISPATCH_RETRY_DELAY', 1)
+
+# Create your outbox here.
+def enqueue(group, payload, event_type='send_notification'):
+	# Written in the caller's transaction, so the message exists iff the data
+	# it describes was committed; the dispatcher publishes it afterwards.
+	return Notification.objects.create(group=group, payload=payload, event_type=event_type)
+
+def enqueue_many(groups, payload, event_type='send_notification'):
+	return Notification.objects.bulk_create([
+		Notification(group=group, payload=payload, event_type=event_type) for group in groups
+	])
+
+def enqueue_batch(messages, event_type='send_notification'):
+	# (group, payload) pairs in one insert; a payload's copies stay adjacent,
+	# which the de-duplication in streams.py relies on.
+	return Notification.objects.bulk_create([
+		Notification(group=group, payload=payload, event_type=event_type) for group, payload in messages
+	], batch_size=1000)
+
+class Dispatcher:
+	def __init__(self, channel_layer=None, batch_size=DISPATCH_BATCH_SIZE, max_in_flight=DISPATCH_MAX_IN_FLIGHT,
+			max_attempts=DISPATCH_MAX_ATTEMPTS, retry_delay=DISPATCH_RETRY_DELAY):
+		self.channel_layer = channel_layer or get_channel_layer()
+		self.batch_size = batch_size
+		self.max_in_flight = max_in_flight
+		self.max_attempts = max_attempts
+		self.retry_delay = retry_delay
+
+	def dispatch_batch(self):
+		with transaction.atomic():
+			notifications = list(Notification.objects.select_for_update(skip_locked=True).filter(
+				sent_at__isnull=True,
+				available_at__lte=datetime.now(),
+				attempts__lt=self.max_attempts,
+			).order_by('available_at', 'id')[:self.batch_size])
+			if not notifications:
+				return 0
+			results = async_to_sync(self.publish)(notifications)
+			now = datetime.now()
+			for notification, error in zip(notifications, results):
+				if error is None:
+					notification.sent_at = now
+				else:
+					# Exponential backoff keeps a struggling channel layer from being
+					# hammered by the same rows on every poll.
+					notification.attempts += 1
+					notification.available_at = now + timedelta(seconds=self.retry_delay * 2 ** notification.attempts)
+			Notification.objects.bulk_update(notifications, ['sent_at', 'attempts', 'available_at'])
+		return len(notifications)
+
+	async def publish(self, notifications):
+		semaphore = asyncio.Semaphore(self.max_in_flight)
+
+		async def send(notification):
+			async with semaphore:
+				try:
+					await self.channel_layer.group_send(notification.group, {
+						'type': notification.event_type,
+						'id': notification.id,
+						'message': notification.payload,
+					})
+				except Exception as e:
+					return e
+			return None
+
+		return await asyncio.gather(*[send(notification) for notification in notifications])
@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Create your pagination here.
+def encode_cursor(*values):
+	values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+	return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, parse=datetime.fromisoformat):
+	try:
+		values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+		value, pk = values
+		return parse(value), int(pk)
+	except (ValueError, TypeError):
+		raise ValidationError('Invalid cursor')
+
+def page_size(request):
+	limit = request.GET.get('limit')
+	if not limit:
+		return DEFAULT_PAGE_SIZE
+	try:
+		limit = int(limit)
+	except ValueError:
+		raise ValidationError('Invalid limit')
+	if limit < 1:
+		raise ValidationError('Invalid limit')
+	return min(limit, MAX_PAGE_SIZE)
+
+def paginate(queryset, request, encoder=None):
+	# Keyset pagination on (timestamp, id) descending. The leading
+	# `timestamp <= cursor` bound lets the composite index serve the page
+	# as a single range scan instead of an OFFSET walk. With an encoder the
+	# page is read as `.values()` rows and returned encoded.
+	limit = page_size(request)
+	queryset = queryset.order_by('-timestamp', '-id')
+	cursor = request.GET.get('cursor')
+	if cursor:
+		timestamp, pk = decode_cursor(cursor)
+		queryset = queryset.filter(Q(timestamp__lte=timestamp), Q(timestamp__lt=timestamp) | Q(id__lt=pk))
+	if encoder is not None:
+		queryset = encoder.values(queryset)
+	page = list(queryset[:limit + 1])
+	next_cursor = None
+	if len(page) > limit:
+		page = page[:limit]
+		if encoder is not None:
+			next_cursor = encode_cursor(page[-1][encoder.index('timestamp')], page[-1][encoder.index('id')])
+		else:
+			next_cursor = encode_cursor(page[-1].timestamp, page[-1].id)
+	if encoder is not None:
+		page = encoder.encode_many(page)
+	return page, next_cursor
@@ -0,0 +1,198 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+from .caching import bump_version
+from .encoders import PREDICTION_ENCODER
+from .geo import GEOCELL_BITS
+from .lifecycle import live_reports
+from .lru import LRUCache
+from .models import Prediction, Report
+from .notifications import notify_predictions
+from .predictors import PREDICTOR_FIELDS, init_worker, load_predictor, predict_chunk
+from .sensors import extract_readings
+
+PREDICTOR = getattr(settings, 'PREDICTOR', 'client.predictors.HeuristicPredictor')
+PREDICTION_BATCH_SIZE = getattr(settings, 'PREDICTION_BATCH_SIZE', 500)
+PREDICTION_WORKERS = getattr(settings, 'PREDICTION_WORKERS', 2)
+PREDICTION_MEMO_SIZE = getattr(settings, 'PREDICTION_MEMO_SIZE', 10000)
+PREDICTION_MEMO_TTL = getattr(settings, 'PREDICTION_MEMO_TTL', 3600) # seconds, for predictions without valid_until
+PREDICTION_SIGNATURE_PRECISION = getattr(settings, 'PREDICTION_SIGNATURE_PRECISION', 6)
+PREDICTION_SIGNATURE_BUCKET = getattr(settings, 'PREDICTION_SIGNATURE_BUCKET', 60) # minutes
+EVENT_MAX_LENGTH = Prediction._meta.get_field('predicted_event').max_length
+
+# Every live representative report gets one prediction per predictor version.
+# A report is pending while it has none from the current version, so there is
+# no cursor to keep and changing PREDICTOR predicts the live window again.
+# Batches are claimed newest first with SKIP LOCKED, so fresh reports are not
+# stuck behind a backlog and several workers never predict the same report.
+#
+# Reports with the same signature (type, grid cell, time bucket, verification,
+# rating and rounded sensor values) get the same prediction, so the predictor
+# runs once per signature: later reports copy the memoized result until its
+# valid_until and link to the original through Prediction.source.
+
+# Create your prediction pipeline here.
+def pending_reports(version):
+	return live_reports(Report.objects.filter(is_duplicate=False)).filter(
+		~Exists(Prediction.objects.filter(report=OuterRef('pk'), ai_model_version=version)),
+	)
+
+def report_features(report):
+	features = {field: getattr(report, field) for field in PREDICTOR_FIELDS}
+	features['latitude'] = float(report.latitude)
+	features['longitude'] = float(report.longitude)
+	return features
+
+def _significant(value):
+	return float(f'{value:.2g}')
+
+def prediction_signature(report):
+	timestamp = _aware(report.timestamp)
+	return (
+		(report.report_type or '').strip().lower(),
+		report.geocell >> (GEOCELL_BITS - 5 * PREDICTION_SIGNATURE_PRECISION) if report.geocell is not None else None,
+		int(timestamp.timestamp()) // (PREDICTION_SIGNATURE_BUCKET * 60),
+		report.verification_status,
+		round(report.rating) if report.rating is not None else None,
+		tuple(sorted((metric, _significant(value)) for metric, value in extract_readings(report.sensor_data))),
+	)
+
+def memo_stats(start, end):
+	# Share of stored predictions that reused a memoized result, per version.
+	rows = Prediction.objects.filter(timestamp__gte=start, timestamp__lt=end).values('ai_model_version').annotate(
+		total=Count('id'), reused=Count('source'),
+	).order_by('ai_model_version')
+	return [{
+		'ai_model_version': row['ai_model_version'],
+		'predictions': row['total'],
+		'reused': row['reused'],
+		'hit_rate': row['reused'] / row['total'],
+	} for row in rows]
+
+def _aware(value):
+	return timezone.make_aware(value) if value is not None and timezone.is_naive(value) else value
+
+class PredictionWorker:
+	def __init__(self, predictor=PREDICTOR, batch_size=PREDICTION_BATCH_SIZE, workers=PREDICTION_WORKERS, memo_size=PREDICTION_MEMO_SIZE):
+		# `workers` processes run the predictor; 0 runs it in this process, and
+		# a memo_size of 0 turns memoization off.
+		# Workers are spawned rather than forked so they never share this
+		# process's database connections.
+		self.predictor = load_predictor(predictor)
+		self.version = self.predictor.version
+		self.batch_size = batch_size
+		self.workers = workers
+		self.pool = None
+		# Memoized predictions by signature, each kept until its valid_until.
+		self.memo = LRUCache(maxsize=memo_size) if memo_size > 0 else None
+		self.hits = self.misses = 0
+		if workers > 0:
+			self.pool = ProcessPoolExecutor(
+				workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker, initargs=(predictor,),
+			)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		if self.pool is not None:
+			self.pool.shutdown()
+			self.pool = None
+
+	def predict(self, features):
+		if self.pool is None or len(features) < 2:
+			return self.predictor.predict(features)
+		size = -(-len(features) // self.workers)
+		chunks = [features[start:start + size] for start in range(0, len(features), size)]
+		return [result for chunk in self.pool.map(predict_chunk, chunks) for result in chunk]
+
+	@property
+	def hit_rate(self):
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else None
+
+	def _remember(self, signature, prediction, now):
+		# Only what a copy needs is kept, not the report the prediction holds.
+		ttl = PREDICTION_MEMO_TTL if prediction.valid_until is None else (_aware(prediction.valid_until) - now).total_seconds()
+		if ttl > 0:
+			self.memo.set(signature, Prediction(
+				id=prediction.id,
+				predicted_event=prediction.predicted_event,
+				generated_text=prediction.generated_text,
+				confidence_score=prediction.confidence_score,
+				valid_until=prediction.valid_until,
+			), ttl)
+
+	def _copy(self, report, source):
+		return Prediction(
+			report=report,
+			predicted_event=source.predicted_event,
+			generated_text=source.generated_text,
+			confidence_score=source.confidence_score,
+			valid_until=source.valid_until,
+			ai_model_version=self.version,
+			source_id=source.id,
+		)
+
+	def generate_batch(self):
+		# The claimed reports stay locked until their predictions commit.
+		with transaction.atomic():
+			reports = list(pending_reports(self.version).select_for_update(skip_locked=True).only(
+				*PREDICTOR_FIELDS, 'geocell', 'user',
+			).order_by('-timestamp', '-id')[:self.batch_size])
+			if not reports:
+				return 0
+			now = timezone.make_aware(datetime.now())
+			# A report is predicted unless its signature is memoized or repeats
+			# an earlier report of this batch; copies are resolved after the
+			# originals are inserted and have ids.
+			computed, copies, originals = [], [], {}
+			for report in reports:
+				signature = prediction_signature(report) if self.memo is not None else None
+				source = self.memo.get(signature) if signature is not None else None
+				if source is not None or (signature is not None and signature in originals):
+					self.hits += 1
+					copies.append((report, signature, source))
+					continue
+				if signature is not None:
+					self.misses += 1
+					originals[signature] = None
+				computed.append((report, signature))
+			results = self.predict([report_features(report) for report, _ in computed])
+			if len(results) != len(computed):
+				raise ValueError(f'{self.version} returned {len(results)} predictions for {len(computed)} reports')
+			predictions = Prediction.objects.bulk_create([
+				Prediction(
+					report=report,
+					predicted_event=result['predicted_event'][:EVENT_MAX_LENGTH],
+					generated_text=result['generated_text'],
+					confidence_score=result['confidence_score'],
+					valid_until=result.get('valid_until'),
+					ai_model_version=self.version,
+				)
+				for (report, _), result in zip(computed, results)
+			], batch_size=1000)
+			for (_, signature), prediction in zip(computed, predictions):
+				if signature is not None:
+					originals[signature] = prediction
+					self._remember(signature, prediction, now)
+			predictions += Prediction.objects.bulk_create([
+				self._copy(report, source or originals[signature]) for report, signature, source in copies
+			], batch_size=1000)
+			# bulk_create() skips post_save, which bumps single inserts.
+			bump_version('prediction', *[prediction.id for prediction in predictions])
+			# Predictions for reports from before a backlog may already have
+			# lapsed; they are stored so the report is done, but nobody is told.
+			notify_predictions(
+				(prediction.report, PREDICTION_ENCODER.encode_instance(prediction))
+				for prediction in predictions
+				if prediction.valid_until is None or _aware(prediction.valid_until) >= now
+			)
+		return len(predictions)
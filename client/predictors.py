@@ -0,0 +1,83 @@
+import math
+from datetime import timedelta
+from django.utils.module_loading import import_string
+
+# Predictors turn report features into predictions. They run in worker
+# processes started by client/predictions.py, so this module must not import
+# models: a spawned worker imports it before Django is set up.
+#
+# A predictor is any class (or factory) named by the PREDICTOR setting with a
+# `version` string, stored as Prediction.ai_model_version, and a
+# `predict(reports)` method. `reports` is a list of dicts with PREDICTOR_FIELDS
+# and the result holds one dict per report, in order, with predicted_event,
+# generated_text, confidence_score and valid_until.
+PREDICTOR_FIELDS = (
+	'id', 'location', 'latitude', 'longitude', 'report_type', 'description', 'timestamp',
+	'sensor_data', 'verification_status', 'rating',
+)
+
+# Event name and how long the prediction holds after the report, per type.
+HEURISTIC_EVENTS = {
+	'traffic': ('Traffic congestion', timedelta(hours=1)),
+	'noise': ('Elevated noise levels', timedelta(hours=2)),
+	'crowd': ('Crowding', timedelta(hours=2)),
+	'crowd level': ('Crowding', timedelta(hours=2)),
+}
+HEURISTIC_DEFAULT_HORIZON = timedelta(hours=1)
+
+# Create your predictors here.
+def load_predictor(path):
+	return import_string(path)()
+
+def _sensor_values(sensor_data):
+	if not isinstance(sensor_data, dict):
+		return 0
+	count = 0
+	for value in sensor_data.values():
+		if isinstance(value, dict):
+			count += _sensor_values(value)
+		elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+			count += 1
+	return count
+
+class HeuristicPredictor:
+	# Deterministic stand-in for a trained model: the same report always gives
+	# the same prediction, which keeps tests and benchmarks reproducible.
+	version = 'heuristic-1'
+
+	def predict_one(self, report):
+		report_type = (report['report_type'] or '').strip()
+		event, horizon = HEURISTIC_EVENTS.get(report_type.lower(), (f'{report_type.capitalize() or "Unusual"} activity', HEURISTIC_DEFAULT_HORIZON))
+		confidence = 0.5
+		if report['verification_status']:
+			confidence += 0.2
+		if report['rating'] is not None:
+			confidence += 0.05 * (min(max(report['rating'], 0), 5) - 2.5)
+		confidence += min(_sensor_values(report['sensor_data']), 3) * 0.05
+		confidence = round(min(max(confidence, 0.05), 0.95), 3)
+		valid_until = report['timestamp'] + horizon
+		place = report['location'] or f'{report["latitude"]:.4f}, {report["longitude"]:.4f}'
+		return {
+			'predicted_event': event,
+			'generated_text': f'{event} likely near {place} until {valid_until:%H:%M}, based on a {"verified " if report["verification_status"] else ""}{report_type or "community"} report.',
+			'confidence_score': confidence,
+			'valid_until': valid_until,
+		}
+
+	def predict(self, reports):
+		return [self.predict_one(report) for report in reports]
+
+_worker_predictor = None
+
+def init_worker(path):
+	# Runs once in every pool process. Predictors may use Django themselves,
+	# so set it up before loading one.
+	global _worker_predictor
+	import django
+	from django.apps import apps
+	if not apps.ready:
+		django.setup()
+	_worker_predictor = load_predictor(path)
+
+def predict_chunk(reports):
+	return _worker_predictor.predict(reports)
@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+from .encoders import orjson
+
+# Create your renderers here.
+class FastJSONRenderer(JSONRenderer):
+	# orjson when it is installed; the stock encoder for pretty-printed
+	# (indented) responses or when it is not.
+	def render(self, data, accepted_media_type=None, renderer_context=None):
+		if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+			return super().render(data, accepted_media_type, renderer_context)
+		return orjson.dumps(data, default=str, option=orjson.OPT_UTC_Z)
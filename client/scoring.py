@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from .models import Feedback, ModelMetric
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+CALIBRATION_BINS = getattr(settings, 'MODEL_METRICS_CALIBRATION_BINS', 10)
+SCORING_BATCH_SIZE = getattr(settings, 'MODEL_METRICS_BATCH_SIZE', 100000)
+# Feedback younger than this is left for the next refresh, so a transaction
+# that took a lower id but commits late is not skipped by the id cursor.
+SCORING_SETTLE_SECONDS = getattr(settings, 'MODEL_METRICS_SETTLE_SECONDS', 60)
+
+FEEDBACK_COLUMNS = ('id', 'prediction__ai_model_version', 'prediction__confidence_score', 'is_accurate', 'rating')
+
+# Create your model scoring here.
+def _empty_totals():
+	return {
+		'feedback_count': 0, 'judged_count': 0, 'accurate_count': 0, 'brier_sum': 0.0,
+		'rating_sum': 0.0, 'rating_count': 0, 'calibration': [[0, 0.0, 0] for _ in range(CALIBRATION_BINS)],
+	}
+
+def _bin(confidence):
+	return min(max(int(confidence * CALIBRATION_BINS), 0), CALIBRATION_BINS - 1)
+
+def score_rows_python(rows):
+	totals = {}
+	for _, version, confidence, accurate, rating in rows:
+		total = totals.get(version)
+		if total is None:
+			total = totals[version] = _empty_totals()
+		total['feedback_count'] += 1
+		if rating is not None:
+			total['rating_sum'] += rating
+			total['rating_count'] += 1
+		if accurate is None:
+			continue
+		confidence = min(max(confidence, 0.0), 1.0)
+		total['judged_count'] += 1
+		total['accurate_count'] += accurate
+		total['brier_sum'] += (confidence - accurate) ** 2
+		calibration = total['calibration'][_bin(confidence)]
+		calibration[0] += 1
+		calibration[1] += confidence
+		calibration[2] += accurate
+	return totals
+
+def score_rows_numpy(rows):
+	# Every statistic is a weighted bincount over the version index (or the
+	# version x confidence-bin index), so the batch is one pass per column.
+	# Columns are pulled one at a time: zip(*rows) builds a tuple per column
+	# value and spends most of its time in the garbage collector.
+	names = list(dict.fromkeys(row[1] for row in rows))
+	lookup = {name: index for index, name in enumerate(names)}
+	count = len(names)
+	version_index = numpy.fromiter((lookup[row[1]] for row in rows), numpy.intp, len(rows))
+	confidence = numpy.clip(numpy.fromiter((row[2] for row in rows), float, len(rows)), 0.0, 1.0)
+	accurate = numpy.array([row[3] for row in rows], dtype=float) # None -> nan
+	rating = numpy.array([row[4] for row in rows], dtype=float)
+	judged = ~numpy.isnan(accurate)
+	outcome = numpy.where(judged, accurate, 0.0)
+	rated = ~numpy.isnan(rating)
+
+	def total(weights=None, index=version_index, length=count):
+		return numpy.bincount(index, weights=weights, minlength=length)
+
+	cells = version_index * CALIBRATION_BINS + numpy.clip((confidence * CALIBRATION_BINS).astype(int), 0, CALIBRATION_BINS - 1)
+
+	def cell_total(weights):
+		return total(weights, cells, count * CALIBRATION_BINS).reshape(count, CALIBRATION_BINS)
+
+	columns = {
+		'feedback_count': total(),
+		'judged_count': total(judged.astype(float)),
+		'accurate_count': total(outcome),
+		'brier_sum': total(numpy.where(judged, (confidence - outcome) ** 2, 0.0)),
+		'rating_sum': total(numpy.where(rated, rating, 0.0)),
+		'rating_count': total(rated.astype(float)),
+	}
+	calibration = numpy.stack([
+		cell_total(judged.astype(float)), cell_total(numpy.where(judged, confidence, 0.0)), cell_total(outcome),
+	], axis=2)
+	return {
+		str(name): {
+			'feedback_count': int(columns['feedback_count'][i]),
+			'judged_count': int(columns['judged_count'][i]),
+			'accurate_count': int(columns['accurate_count'][i]),
+			'brier_sum': float(columns['brier_sum'][i]),
+			'rating_sum': float(columns['rating_sum'][i]),
+			'rating_count': int(columns['rating_count'][i]),
+			'calibration': [[int(n), float(confidence_sum), int(accurate_sum)] for n, confidence_sum, accurate_sum in calibration[i]],
+		}
+		for i, name in enumerate(names)
+	}
+
+def score_rows(rows):
+	# Rows are FEEDBACK_COLUMNS tuples; returns totals per model version.
+	if not rows:
+		return {}
+	return score_rows_numpy(rows) if numpy is not None else score_rows_python(rows)
+
+def _merge(metric, totals):
+	for field in ('feedback_count', 'judged_count', 'accurate_count', 'brier_sum', 'rating_sum', 'rating_count'):
+		setattr(metric, field, getattr(metric, field) + totals[field])
+	if len(metric.calibration) != CALIBRATION_BINS:
+		metric.calibration = [[0, 0.0, 0] for _ in range(CALIBRATION_BINS)]
+	metric.calibration = [
+		[old[0] + new[0], old[1] + new[1], old[2] + new[2]]
+		for old, new in zip(metric.calibration, totals['calibration'])
+	]
+
+def refresh_model_metrics(batch_size=SCORING_BATCH_SIZE):
+	# Folds the next batch of prediction feedback after the stored cursor into
+	# the summary rows. Existing rows are locked for the whole batch, so two
+	# refreshers never count the same feedback twice.
+	with transaction.atomic():
+		metrics = {metric.ai_model_version: metric for metric in ModelMetric.objects.select_for_update()}
+		cursor = max((metric.last_feedback_id for metric in metrics.values()), default=0)
+		rows = list(Feedback.objects.filter(
+			id__gt=cursor,
+			prediction__isnull=False,
+			timestamp__lt=datetime.now() - timedelta(seconds=SCORING_SETTLE_SECONDS),
+		).order_by('id').values_list(*FEEDBACK_COLUMNS)[:batch_size])
+		if not rows:
+			return 0
+		last_feedback_id, now = rows[-1][0], datetime.now()
+		for version, totals in score_rows(rows).items():
+			metric = metrics.get(version)
+			if metric is None:
+				metric = metrics[version] = ModelMetric(ai_model_version=version, calibration=[])
+			_merge(metric, totals)
+		# Every row carries the cursor, so it survives whichever versions the
+		# next batch touches.
+		for metric in metrics.values():
+			metric.last_feedback_id = last_feedback_id
+			metric.last_modified = now
+			metric.save()
+	return len(rows)
+
+def rebuild_model_metrics(batch_size=SCORING_BATCH_SIZE):
+	# Recounts everything, picking up edited and deleted feedback that the
+	# incremental path never sees.
+	with transaction.atomic():
+		ModelMetric.objects.all().delete()
+		total = 0
+		while True:
+			processed = refresh_model_metrics(batch_size)
+			total += processed
+			if processed < batch_size:
+				return total
+
+def model_metrics(ai_model_version=None):
+	metrics = ModelMetric.objects.order_by('ai_model_version')
+	if ai_model_version:
+		metrics = metrics.filter(ai_model_version=ai_model_version)
+	return [{
+		'ai_model_version': metric.ai_model_version,
+		'feedback_count': metric.feedback_count,
+		'judged_count': metric.judged_count,
+		'accuracy': metric.accurate_count / metric.judged_count if metric.judged_count else None,
+		'brier_score': metric.brier_sum / metric.judged_count if metric.judged_count else None,
+		'average_rating': metric.rating_sum / metric.rating_count if metric.rating_count else None,
+		'calibration': [{
+			'low': index / len(metric.calibration),
+			'high': (index + 1) / len(metric.calibration),
+			'count': judged,
+			'mean_confidence': confidence / judged if judged else None,
+			'accuracy': accurate / judged if judged else None,
+		} for index, (judged, confidence, accurate) in enumerate(metric.calibration)],
+		'last_feedback_id': metric.last_feedback_id,
+		'last_modified': metric.last_modified,
+	} for metric in metrics]
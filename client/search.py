@@ -0,0 +1,124 @@
+import re
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Q, Value, FloatField
+
+SEARCH_CONFIG = 'english'
+# Indexed text per model, keyed by table name.
+SEARCH_FIELDS = {
+	'client_report': ('report_type', 'location', 'description'),
+	'client_prediction': ('predicted_event', 'generated_text'),
+}
+
+# Create your search helpers here.
+def _no_match(queryset):
+	# Still carries `rank` so callers can select it.
+	return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+
+def search_vector(table):
+	return SearchVector(*SEARCH_FIELDS[table], config=SEARCH_CONFIG)
+
+def search_index(table):
+	# A GIN expression index over exactly the vector search_queryset() builds, so the
+	# planner can match `to_tsvector(...) @@ query` against it.
+	return GinIndex(search_vector(table), name='%s_search_idx' % table[len('client_'):])
+
+def fts_table(table):
+	return '%s_fts' % table
+
+def search_terms(query):
+	return re.findall(r'\w+', query.lower())
+
+def create_search_index(model, schema_editor):
+	table = model._meta.db_table
+	connection = schema_editor.connection
+	if connection.vendor == 'postgresql':
+		schema_editor.add_index(model, search_index(table))
+	elif connection.vendor == 'sqlite':
+		ensure_fts(connection, table)
+
+def drop_search_index(model, schema_editor):
+	table = model._meta.db_table
+	connection = schema_editor.connection
+	if connection.vendor == 'postgresql':
+		schema_editor.remove_index(model, search_index(table))
+	elif connection.vendor == 'sqlite':
+		with connection.cursor() as cursor:
+			for action in ('insert', 'delete', 'update'):
+				cursor.execute('DROP TRIGGER IF EXISTS %s_%s' % (fts_table(table), action))
+			cursor.execute('DROP TABLE IF EXISTS %s' % fts_table(table))
+
+def ensure_fts(connection, table):
+	# SQLite keeps an external-content FTS5 table in sync through triggers.
+	# Rebuilding a table during a schema change drops its triggers, so this
+	# is re-run after every migrate and rebuilds the index when they are gone.
+	fts, fields = fts_table(table), SEARCH_FIELDS[table]
+	columns = ', '.join(fields)
+	new_values = ', '.join('new.%s' % field for field in fields)
+	old_values = ', '.join('old.%s' % field for field in fields)
+	with connection.cursor() as cursor:
+		cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", ['%s_%%' % fts])
+		if len(cursor.fetchall()) == 3:
+			return
+		cursor.execute(
+			"CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s, content='%s', content_rowid='id', tokenize='porter unicode61')"
+			% (fts, columns, table))
+		cursor.execute(
+			'CREATE TRIGGER IF NOT EXISTS %s_insert AFTER INSERT ON %s BEGIN '
+			'INSERT INTO %s(rowid, %s) VALUES (new.id, %s); END'
+			% (fts, table, fts, columns, new_values))
+		cursor.execute(
+			'CREATE TRIGGER IF NOT EXISTS %s_delete AFTER DELETE ON %s BEGIN '
+			"INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s); END"
+			% (fts, table, fts, fts, columns, old_values))
+		cursor.execute(
+			'CREATE TRIGGER IF NOT EXISTS %s_update AFTER UPDATE OF %s ON %s BEGIN '
+			"INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s); "
+			'INSERT INTO %s(rowid, %s) VALUES (new.id, %s); END'
+			% (fts, columns, table, fts, fts, columns, old_values, fts, columns, new_values))
+		cursor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (fts, fts))
+
+def ensure_search_indexes(sender, using, **kwargs):
+	connection = connections[using]
+	if connection.vendor != 'sqlite':
+		return
+	tables = connection.introspection.table_names()
+	for table in SEARCH_FIELDS:
+		if table in tables:
+			ensure_fts(connection, table)
+
+def search_queryset(queryset, query, cursor=None):
+	# Returns `queryset` narrowed to rows matching `query`, annotated with a
+	# `rank` (higher is better) and ordered by (rank, id) descending.
+	# `cursor` is a (rank, id) pair from the previous page.
+	connection = connections[queryset.db]
+	table = queryset.model._meta.db_table
+	if connection.vendor == 'postgresql':
+		search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+		queryset = queryset.alias(document=search_vector(table)).filter(document=search_query)
+		queryset = queryset.annotate(rank=SearchRank(search_vector(table), search_query))
+		if cursor:
+			queryset = queryset.filter(Q(rank__lt=cursor[0]) | Q(rank=cursor[0], id__lt=cursor[1]))
+	elif connection.vendor == 'sqlite':
+		terms = search_terms(query)
+		if not terms:
+			return _no_match(queryset)
+		fts = fts_table(table)
+		rank = '-bm25(%s)' % fts
+		where = ['%s MATCH %%s' % fts, '%s.rowid = %s.id' % (fts, table)]
+		params = [' '.join('"%s"' % term for term in terms)]
+		if cursor:
+			where.append('(%s < %%s OR (%s = %%s AND %s.id < %%s))' % (rank, rank, table))
+			params.extend([cursor[0], cursor[0], cursor[1]])
+		queryset = queryset.extra(select={'rank': rank}, tables=[fts], where=where, params=params)
+	else:
+		terms = search_terms(query)
+		if not terms:
+			return _no_match(queryset)
+		for term in terms:
+			queryset = queryset.filter(Q(*[Q(**{'%s__icontains' % field: term}) for field in SEARCH_FIELDS[table]], _connector=Q.OR))
+		queryset = queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+		if cursor:
+			queryset = queryset.filter(id__lt=cursor[1])
+	return queryset.order_by('-rank', '-id')
@@ -0,0 +1,73 @@
+import math
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import Trunc
+from .models import SensorReading
+
+SENSOR_BUCKETS = ('minute', 'hour', 'day', 'week', 'month')
+SENSOR_BUCKET_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800, 'month': 2678400}
+MAX_SERIES_POINTS = getattr(settings, 'SENSOR_MAX_SERIES_POINTS', 2000)
+METRIC_MAX_LENGTH = SensorReading._meta.get_field('metric').max_length
+
+# Create your sensor readings here.
+def _number(value):
+	if isinstance(value, bool):
+		return None
+	if isinstance(value, str):
+		try:
+			value = float(value)
+		except ValueError:
+			return None
+	if not isinstance(value, (int, float)):
+		return None
+	value = float(value)
+	return value if math.isfinite(value) else None
+
+def extract_readings(sensor_data, prefix=''):
+	# Yields (metric, value) for every numeric leaf; nested objects become
+	# dotted metric names, e.g. {"air": {"pm25": 12}} -> air.pm25.
+	if not isinstance(sensor_data, dict):
+		return
+	for key, value in sensor_data.items():
+		metric = f'{prefix}{key}'
+		if isinstance(value, dict):
+			yield from extract_readings(value, f'{metric}.')
+			continue
+		value = _number(value)
+		if value is not None and len(metric) <= METRIC_MAX_LENGTH:
+			yield metric, value
+
+def report_readings(report):
+	return [
+		SensorReading(report_id=report.id, metric=metric, timestamp=report.timestamp, value=value)
+		for metric, value in extract_readings(report.sensor_data)
+	]
+
+def record_readings(reports):
+	# Called in the same transaction as the report insert, like record_reports().
+	readings = [reading for report in reports if report.id is not None for reading in report_readings(report)]
+	SensorReading.objects.bulk_create(readings, batch_size=1000, ignore_conflicts=True)
+	return len(readings)
+
+def series_points(start, end, bucket):
+	return math.ceil((end - start).total_seconds() / SENSOR_BUCKET_SECONDS[bucket])
+
+def sensor_series(metric, start, end, bucket='hour'):
+	# Downsampling happens in the database: one (metric, timestamp) range scan
+	# on the primary key, grouped into buckets, so a chart over weeks returns
+	# a few hundred rows however many readings it covers.
+	rows = SensorReading.objects.filter(metric=metric, timestamp__gte=start, timestamp__lt=end).annotate(
+		period=Trunc('timestamp', bucket),
+	).values('period').annotate(
+		count=Count('value'),
+		min=Min('value'),
+		max=Max('value'),
+		avg=Avg('value'),
+	).order_by('period')
+	return [{
+		'bucket': row['period'],
+		'count': row['count'],
+		'min': row['min'],
+		'max': row['max'],
+		'avg': row['avg'],
+	} for row in rows]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Profile, Report, Prediction, Feedback
+from .images import rendition_url
+from .encoders import REPORT_EXCLUDE, FEEDBACK_EXCLUDE
 
 # Create your serializers here.
 class UserSerializer(serializers.ModelSerializer):
@@ -13,6 +15,15 @@ class ProfileSerializer(serializers.ModelSerializer):
 	profile_picture = serializers.SerializerMethodField()
 
 	def get_profile_picture(self, obj):
+		request = self.context.get('request')
+		size, webp = None, False
+		if request is not None:
+			size = request.GET.get('size')
+			size = int(size) if size and size.isdigit() else None
+			webp = request.GET.get('picture-format') == 'webp'
+		url = rendition_url(obj.profile_picture_renditions, size, webp)
+		if url:
+			return url
 		if obj.profile_picture:
 			return obj.profile_picture.url
 		return None
@@ -24,7 +35,12 @@ class ProfileSerializer(serializers.ModelSerializer):
 class ReportSerializer(serializers.ModelSerializer):
 	class Meta:
 		model = Report
-		fields = '__all__'
+		exclude = REPORT_EXCLUDE
+
+class ReportIngestSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = Report
+		fields = ['location', 'latitude', 'longitude', 'report_type', 'description', 'timestamp', 'sensor_data', 'rating']
 
 class PredictionSerializer(serializers.ModelSerializer):
 	class Meta:
@@ -34,4 +50,4 @@ class PredictionSerializer(serializers.ModelSerializer):
 class FeedbackSerializer(serializers.ModelSerializer):
 	class Meta:
 		model = Feedback
-		fields = '__all__'
+		exclude = FEEDBACK_EXCLUDE
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .models import Profile, Report, Prediction, Feedback
+from .auth import invalidate_token, invalidate_user
+from .caching import bump_version
+from .encoders import REPORT_ENCODER
+from .outbox import enqueue
+from .pagination import encode_cursor
+
+REPORTS_GROUP = 'reports'
+
+# Create your signals here.
+def publish_reports(reports):
+	if not reports:
+		return
+	bump_version('report', *[report.id for report in reports])
+	# Sockets only carry one report per incident, see client/clusters.py.
+	reports = [report for report in reports if not report.is_duplicate]
+	if not reports:
+		return
+	enqueue(REPORTS_GROUP, {
+		'reports': [REPORT_ENCODER.encode_instance(report) for report in reports],
+		'cursor': encode_cursor(reports[-1].last_modified, reports[-1].id),
+	}, event_type='report_update')
+
+@receiver(post_save, sender=Report)
+def report_saved(sender, instance, **kwargs):
+	publish_reports([instance])
+
+@receiver(post_delete, sender=Report)
+def report_deleted(sender, instance, **kwargs):
+	bump_version('report', instance.id)
+
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def prediction_changed(sender, instance, **kwargs):
+	bump_version('prediction', instance.id)
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def feedback_changed(sender, instance, **kwargs):
+	# reply_count is not part of the payload, so the parent's own lists are
+	# unaffected by its replies.
+	bump_version('feedbacks', instance.prediction_id)
+	bump_version('replies', instance.parent_feedback_id)
+
+@receiver(post_delete, sender=Feedback)
+def feedback_deleted(sender, instance, **kwargs):
+	if instance.parent_feedback_id:
+		Feedback.objects.filter(pk=instance.parent_feedback_id).update(reply_count=F('reply_count') - 1)
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+	transaction.on_commit(lambda: invalidate_token(instance.key))
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def user_saved(sender, instance, **kwargs):
+	user_id = instance.pk if sender is User else instance.user_id
+	# Like bump_version(), only once the change is visible to the next read.
+	transaction.on_commit(lambda: invalidate_user(user_id))
+	bump_version('profile', user_id)
@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Trunc, TruncHour
+from django.utils import timezone
+from .geo import GEOCELL_BITS
+from .models import Report, ReportStat
+
+STATS_CELL_PRECISION = getattr(settings, 'STATS_CELL_PRECISION', 4)
+STATS_CELL_SHIFT = GEOCELL_BITS - 5 * STATS_CELL_PRECISION
+STATS_BUCKETS = ('hour', 'day', 'week', 'month')
+
+# Create your report statistics here.
+def stat_cell(geocell):
+	return geocell >> STATS_CELL_SHIFT
+
+def stat_bucket(timestamp):
+	# Whole UTC hours, as TruncHour() cuts them in rebuild_report_stats(); an
+	# offset like +05:30 would otherwise land a report half an hour off.
+	if timezone.is_naive(timestamp):
+		timestamp = timezone.make_aware(timestamp)
+	return timezone.localtime(timestamp, dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def record_reports(reports):
+	# Folds newly created reports into their hourly rollup rows. Reports are
+	# grouped first so a bulk upload touches each row once, and rows are
+	# bumped with `F()` so concurrent writers never lose an increment.
+	totals = defaultdict(lambda: [0, 0.0, 0, 0])
+	for report in reports:
+		if report.geocell is None:
+			continue
+		total = totals[(stat_bucket(report.timestamp), report.report_type, stat_cell(report.geocell))]
+		total[0] += 1
+		if report.rating is not None:
+			total[1] += float(report.rating)
+			total[2] += 1
+		if report.verification_status:
+			total[3] += 1
+	for (bucket, report_type, cell), (report_count, rating_sum, rating_count, verified_count) in totals.items():
+		stat = ReportStat.objects.filter(bucket=bucket, report_type=report_type, cell=cell)
+		increments = {
+			'report_count': F('report_count') + report_count,
+			'rating_sum': F('rating_sum') + rating_sum,
+			'rating_count': F('rating_count') + rating_count,
+			'verified_count': F('verified_count') + verified_count,
+		}
+		if stat.update(**increments):
+			continue
+		try:
+			with transaction.atomic():
+				ReportStat.objects.create(
+					bucket=bucket, report_type=report_type, cell=cell,
+					report_count=report_count, rating_sum=rating_sum,
+					rating_count=rating_count, verified_count=verified_count)
+		except IntegrityError:
+			stat.update(**increments)
+
+def rebuild_report_stats(start=None, end=None):
+	# Recomputes the rollup for [start, end) straight from the reports table,
+	# picking up edits (ratings, verification) the incremental path never sees.
+	# Both bounds are rounded down to whole hours; without them the whole
+	# history is rebuilt.
+	reports = Report.objects.filter(geocell__isnull=False)
+	stats = ReportStat.objects.all()
+	if start is not None:
+		start = stat_bucket(start)
+		reports, stats = reports.filter(timestamp__gte=start), stats.filter(bucket__gte=start)
+	if end is not None:
+		end = stat_bucket(end)
+		reports, stats = reports.filter(timestamp__lt=end), stats.filter(bucket__lt=end)
+	rows = reports.annotate(
+		bucket=TruncHour('timestamp'),
+		cell=F('geocell') / (1 << STATS_CELL_SHIFT),
+	).values('bucket', 'report_type', 'cell').annotate(
+		report_count=Count('id'),
+		rating_sum=Sum('rating'),
+		rating_count=Count('rating'),
+		verified_count=Count('id', filter=Q(verification_status=True)),
+	).order_by()
+	rebuilt = [ReportStat(
+		bucket=row['bucket'], report_type=row['report_type'], cell=row['cell'],
+		report_count=row['report_count'], rating_sum=row['rating_sum'] or 0,
+		rating_count=row['rating_count'], verified_count=row['verified_count'],
+	) for row in rows]
+	with transaction.atomic():
+		stats.delete()
+		ReportStat.objects.bulk_create(rebuilt, batch_size=1000)
+	return len(rebuilt)
+
+def report_stats(start, end, bucket='hour', cell_ranges=None, report_type=None):
+	# Reads only rollup rows, so the cost grows with the number of buckets in
+	# the range rather than the number of reports.
+	stats = ReportStat.objects.filter(bucket__gte=start, bucket__lt=end)
+	if report_type:
+		stats = stats.filter(report_type=report_type)
+	if cell_ranges:
+		query = Q()
+		for low, high in cell_ranges:
+			query |= Q(cell__gte=stat_cell(low), cell__lte=stat_cell(high - 1))
+		stats = stats.filter(query)
+	rows = stats.annotate(period=Trunc('bucket', bucket)).values('period', 'report_type').annotate(
+		report_count=Sum('report_count'),
+		rating_sum=Sum('rating_sum'),
+		rating_count=Sum('rating_count'),
+		verified_count=Sum('verified_count'),
+	).order_by('period', 'report_type')
+	return [{
+		'bucket': row['period'],
+		'report_type': row['report_type'],
+		'report_count': row['report_count'],
+		'average_rating': row['rating_sum'] / row['rating_count'] if row['rating_count'] else None,
+		'verification_rate': row['verified_count'] / row['report_count'] if row['report_count'] else None,
+	} for row in rows]
@@ -0,0 +1,107 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from .auth import resolve_token
+from .encoders import dumps
+from .models import Notification
+from .notifications import subscription_groups
+
+SSE_KEEPALIVE = getattr(settings, 'SSE_KEEPALIVE', 15)
+SSE_RETRY = getattr(settings, 'SSE_RETRY', 3000)
+SSE_REPLAY_LIMIT = getattr(settings, 'SSE_REPLAY_LIMIT', 500)
+
+# Read-only feeds for clients that only listen. The stream joins the same
+# groups as NotificationConsumer and uses the outbox id as the SSE event id, so
+# a reconnect with Last-Event-ID replays what was published in between. An
+# idle stream holds one channel and a suspended generator, nothing else.
+
+# Create your streams here.
+def _error(message, status_code):
+	return JsonResponse({
+		'status': 'error',
+		'code': status_code,
+		'data': message,
+		'timestamp': datetime.now().isoformat(),
+	}, status=status_code)
+
+def _event(event_id, data, event='notification'):
+	return f'id: {event_id}\nevent: {event}\ndata: {dumps(data)}\n\n'
+
+def _last_event_id(request):
+	value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+	try:
+		return int(value) if value else None
+	except ValueError:
+		return None
+
+def _replay(groups, last_event_id):
+	# The client's last event is included so its copies in the other groups,
+	# which enqueue_many() wrote right after it, are recognised as seen.
+	return list(Notification.objects.filter(
+		group__in=groups, id__gte=last_event_id, sent_at__isnull=False,
+	).order_by('id').values_list('id', 'payload')[:SSE_REPLAY_LIMIT + 1])
+
+async def notification_events(groups, last_event_id=None):
+	channel_layer = get_channel_layer()
+	channel = await channel_layer.new_channel()
+	# Join before replaying so nothing published in between is missed; the
+	# overlap is dropped by the de-duplication below.
+	for group in groups:
+		await channel_layer.group_add(group, channel)
+	recent = deque(maxlen=64)
+
+	def seen(message):
+		# The same prediction reaches a subscriber once per matching group.
+		if message.get('id') is None:
+			return False
+		if message['id'] in recent:
+			return True
+		recent.append(message['id'])
+		return False
+
+	try:
+		yield f'retry: {SSE_RETRY}\n\n'
+		if last_event_id is not None:
+			for event_id, payload in await database_sync_to_async(_replay)(groups, last_event_id):
+				if not seen(payload) and event_id != last_event_id:
+					yield _event(event_id, payload)
+		while True:
+			try:
+				event = await asyncio.wait_for(channel_layer.receive(channel), SSE_KEEPALIVE)
+			except asyncio.TimeoutError:
+				# Keeps proxies from closing the idle connection.
+				yield ': keepalive\n\n'
+				continue
+			if event.get('type') != 'send_notification' or seen(event['message']):
+				continue
+			yield _event(event['id'], event['message'])
+	finally:
+		for group in groups:
+			await channel_layer.group_discard(group, channel)
+
+async def notification_stream(request):
+	token = request.GET.get('token')
+	authorization = request.headers.get('Authorization', '')
+	if not token and authorization.startswith('Token '):
+		token = authorization[len('Token '):].strip()
+	user = None
+	if token:
+		user = await database_sync_to_async(resolve_token)(token)
+		if user is None:
+			return _error('Invalid token', 400)
+	groups = await database_sync_to_async(subscription_groups)(
+		user, request.GET.get('latitude'), request.GET.get('longitude'),
+	)
+	if not groups:
+		return _error('Nothing to subscribe to', 400)
+	response = StreamingHttpResponse(
+		notification_events(groups, _last_event_id(request)), content_type='text/event-stream',
+	)
+	response['Cache-Control'] = 'no-cache'
+	# Tells nginx not to buffer the stream.
+	response['X-Accel-Buffering'] = 'no'
+	return response
@@ -1,3 +1,150 @@
-from django.test import TestCase
+import json
+from io import StringIO
+from datetime import timedelta
+from smtplib import SMTPException
+from autobahn.websocket.compress import PerMessageDeflateOffer
+import asyncio
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from futurepulse.server import accept_deflate
+from .consumers import NotificationConsumer
+from .geo import geohash
+from .mail import enqueue_mail, send_queued_mail, MAIL_QUEUE_RETRY_DELAY
+from .models import Notification, OutboundEmail
+from .notifications import cell_group, NOTIFICATION_CELL_PRECISION
+from .outbox import Dispatcher, enqueue
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
 
 # Create your tests here.
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class NotificationBurstTests(SimpleTestCase):
+	latitude, longitude = 40.7, -74.0
+	# A wide window, so only batch_size decides where frames are cut.
+	consumer = type('BurstConsumer', (NotificationConsumer,), {'batch_window': 1000})
+
+	async def burst(self, query=''):
+		# Sends two batches' worth of notifications to the socket's cell and
+		# returns the frames it received.
+		communicator = WebsocketCommunicator(
+			self.consumer.as_asgi(), f'/ws/notifications/?latitude={self.latitude}&longitude={self.longitude}{query}')
+		connected, _ = await communicator.connect()
+		self.assertTrue(connected)
+		events = 2 * self.consumer.batch_size
+		group = cell_group(geohash(self.latitude, self.longitude, NOTIFICATION_CELL_PRECISION))
+		for i in range(events):
+			await get_channel_layer().group_send(group, {'type': 'send_notification', 'id': i, 'message': {
+				'id': i, 'predicted_event': 'Traffic congestion', 'confidence_score': 0.8,
+			}})
+		frames, received = [], []
+		while len(received) < events:
+			frame = await communicator.receive_from(timeout=2)
+			data = json.loads(frame)
+			received += data['notifications'] if 'notifications' in data else [data['notification']]
+			frames.append(frame)
+		self.assertTrue(await communicator.receive_nothing())
+		await communicator.disconnect()
+		self.assertEqual([message['id'] for message in received], list(range(events)))
+		return frames
+
+	async def test_burst_without_batching_sends_a_frame_per_notification(self):
+		frames = await self.burst()
+		self.assertEqual(len(frames), 2 * self.consumer.batch_size)
+		self.assertTrue(all('notification' in json.loads(frame) for frame in frames))
+
+	async def test_burst_with_batching_coalesces_frames(self):
+		single = await self.burst()
+		batched = await self.burst('&batch=1')
+		self.assertEqual(len(batched), 2)
+		self.assertLess(sum(len(frame.encode()) for frame in batched), sum(len(frame.encode()) for frame in single))
+
+	def test_server_accepts_permessage_deflate(self):
+		offer = PerMessageDeflateOffer()
+		self.assertIs(accept_deflate([offer]).offer, offer)
+		self.assertIsNone(accept_deflate([]))
+
+class FailingEmailBackend(EmailBackend):
+	def send_messages(self, messages):
+		raise SMTPException('mailbox unavailable')
+
+class UnreachableEmailBackend(EmailBackend):
+	def open(self):
+		raise ConnectionRefusedError('connection refused')
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class MailQueueTests(TestCase):
+	def test_mail_is_sent_once_after_commit(self):
+		with transaction.atomic():
+			email = enqueue_mail('Reset your password', 'Follow the link', 'noreply@futurepulse.app', ['user@example.com'])
+			self.assertEqual(mail.outbox, [])
+		self.assertEqual(mail.outbox, [])
+		call_command('send_queued_mail', '--once', stdout=StringIO())
+		call_command('send_queued_mail', '--once', stdout=StringIO())
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].subject, 'Reset your password')
+		self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+		email.refresh_from_db()
+		self.assertIsNotNone(email.sent_at)
+		self.assertEqual(email.attempts, 0)
+
+	def assertBackedOff(self, email):
+		email.refresh_from_db()
+		self.assertIsNone(email.sent_at)
+		self.assertEqual(email.attempts, 1)
+		self.assertGreater(email.available_at, timezone.now() + timedelta(seconds=MAIL_QUEUE_RETRY_DELAY))
+		self.assertTrue(email.last_error)
+
+	def test_failed_send_backs_off(self):
+		email = enqueue_mail('Verify your email', 'Follow the link', 'noreply@futurepulse.app', ['user@example.com'])
+		self.assertEqual(send_queued_mail(connection=FailingEmailBackend()), 1)
+		self.assertBackedOff(email)
+		self.assertEqual(mail.outbox, [])
+		# Not due again until the backoff runs out.
+		self.assertEqual(send_queued_mail(), 0)
+
+	def test_unreachable_server_backs_off_the_batch(self):
+		emails = [enqueue_mail('Verify your email', 'Follow the link', None, [f'user{i}@example.com']) for i in range(3)]
+		self.assertEqual(send_queued_mail(connection=UnreachableEmailBackend()), 3)
+		for email in emails:
+			self.assertBackedOff(email)
+		self.assertEqual(OutboundEmail.objects.filter(sent_at__isnull=False).count(), 0)
+
+class DispatcherTests(TestCase):
+	def setUp(self):
+		self.channel_layer = InMemoryChannelLayer()
+		self.dispatcher = Dispatcher(channel_layer=self.channel_layer)
+		self.channel = async_to_sync(self.channel_layer.new_channel)()
+		async_to_sync(self.channel_layer.group_add)('reports', self.channel)
+
+	async def receive_all(self):
+		messages = []
+		while True:
+			try:
+				messages.append(await asyncio.wait_for(self.channel_layer.receive(self.channel), 0.1))
+			except asyncio.TimeoutError:
+				return messages
+
+	def test_committed_notification_is_sent_once(self):
+		notification = enqueue('reports', {'reports': [1]})
+		self.assertEqual(self.dispatcher.dispatch_batch(), 1)
+		self.assertEqual(self.dispatcher.dispatch_batch(), 0)
+		self.assertEqual(async_to_sync(self.receive_all)(), [
+			{'type': 'send_notification', 'id': notification.id, 'message': {'reports': [1]}},
+		])
+		notification.refresh_from_db()
+		self.assertIsNotNone(notification.sent_at)
+
+	def test_rolled_back_notification_is_never_sent(self):
+		with transaction.atomic():
+			enqueue('reports', {'reports': [1]})
+			transaction.set_rollback(True)
+		self.assertEqual(self.dispatcher.dispatch_batch(), 0)
+		self.assertEqual(async_to_sync(self.receive_all)(), [])
+		self.assertFalse(Notification.objects.exists())
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, streams
 
 # Create your urls here.
 urlpatterns = [
@@ -15,14 +15,23 @@ urlpatterns = [
 	path('turn-off-notifications/', views.turn_off_notifications),
 	path('update-profile/', views.update_profile),
 	path('submit-report/', views.submit_report),
+	path('submit-reports/', views.submit_reports),
 	path('reports/', views.reports),
+	path('reports/nearby/', views.nearby_reports),
+	path('reports/stats/', views.report_stats_view),
 	path('report/', views.report),
+	path('sensors/series/', views.sensor_series_view),
+	path('search/', views.search),
 	path('submit-prediction/', views.submit_prediction),
 	path('predictions/', views.predictions),
+	path('models/metrics/', views.model_metrics_view),
+	path('predictions/memo/', views.prediction_memo_view),
 	path('prediction/', views.prediction),
 	path('submit-report-feedback/', views.submit_report_feedback),
 	path('submit-prediction-feedback/', views.submit_prediction_feedback),
 	path('submit-feedback-reply/', views.submit_feedback_reply),
 	path('feedbacks/', views.feedbacks),
 	path('replies/', views.replies),
+	path('feedback-thread/', views.feedback_thread),
+	path('notifications/stream/', streams.notification_stream),
 ]
@@ -2,22 +2,45 @@ from django.shortcuts import render
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.core import signing
-from django.core.mail import send_mail
+from django.db import transaction, DatabaseError
 from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.throttling import AnonRateThrottle
 from rest_framework.exceptions import ValidationError
 from rest_framework import status
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import wraps
 from django.conf import settings
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from django.utils import timezone
+from django.utils.http import parse_etags
 from PIL import Image
-import io
+import json
 import re
 from .models import Profile, Report, Prediction, Feedback
-from .serializers import UserSerializer, ProfileSerializer, ReportSerializer, PredictionSerializer, FeedbackSerializer
+from .serializers import UserSerializer, ProfileSerializer, ReportSerializer, ReportIngestSerializer, PredictionSerializer
+from .auth import resolve_token
+from .caching import get_version, request_variant, make_etag, get_cached_response, set_cached_response
+from .signals import publish_reports
+from .notifications import notify_prediction
+from .mail import enqueue_mail
+from .images import schedule_profile_picture
+from .pagination import paginate, page_size, encode_cursor, decode_cursor
+from .geo import bbox_q, in_bbox, haversine, radius_bbox, cover, split_bbox, geohash_range
+from .search import search_queryset
+from .encoders import REPORT_ENCODER, PREDICTION_ENCODER, FEEDBACK_ENCODER
+from .stats import record_reports, report_stats, STATS_BUCKETS
+from .lifecycle import live_reports, live_predictions
+from .scoring import model_metrics
+from .predictions import memo_stats
+from .clusters import cluster_reports, release_failed, record_clusters, representatives
+from .sensors import record_readings, sensor_series, series_points, SENSOR_BUCKETS, MAX_SERIES_POINTS
+
+MAX_NEARBY_RADIUS = 50000
+BULK_REPORT_MAX_ROWS = 5000
+BULK_REPORT_CHUNK_SIZE = 500
+MAX_THREAD_DEPTH = 50
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
 
 class AuthRateThrottle(AnonRateThrottle):
     rate = '5/min'
@@ -47,14 +70,6 @@ def validate_image(image):
     except Exception as e:
         raise ValidationError('Invalid image format')
 
-def optimize_image(image, max_size=(800, 800)):
-    img = Image.open(image)
-    img.thumbnail(max_size, Image.LANCZOS)
-    output = io.BytesIO()
-    img.save(output, format='JPEG', quality=85, optimize=True)
-    output.seek(0)
-    return output
-
 def error_response(message, status_code):
     return Response({
         'status': 'error',
@@ -63,14 +78,125 @@ def error_response(message, status_code):
         'timestamp': datetime.now().isoformat()
     }, status=status_code)
 
-def success_response(data, status_code=status.HTTP_200_OK):
+def success_response(data, status_code=status.HTTP_200_OK, **meta):
     return Response({
         'status': 'success',
         'code': status_code,
         'data': data,
+        **meta,
         'timestamp': datetime.now().isoformat()
     }, status=status_code)
 
+def token_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = request.GET.get('token')
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if not token and authorization.startswith('Token '):
+            token = authorization[len('Token '):].strip()
+        if not token:
+            return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+        user = resolve_token(token)
+        if user is None:
+            return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+        request.user = user
+        return view(request, *args, **kwargs)
+    return wrapper
+
+def user_profile(user):
+    # Users created outside register(), e.g. with createsuperuser, have no
+    # profile row yet; the first request that needs one creates it.
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
+
+def time_range(request, default=timedelta(days=1)):
+    # Bounds without an offset are read in the current time zone, so a naive
+    # bound never meets an aware one; raises ValueError for unparsable input.
+    end = datetime.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.now()
+    start = datetime.fromisoformat(request.GET['start']) if request.GET.get('start') else end - default
+    return tuple(timezone.make_aware(bound) if timezone.is_naive(bound) else bound for bound in (start, end))
+
+def cached_response(kind, key):
+    # `key(request)` picks the object whose version stamp guards the response.
+    # Matching If-None-Match headers get a 304 before the view touches the
+    # database; otherwise the serialized data is served from the cache.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            pk = key(request)
+            if pk is None or request.method != 'GET':
+                return view(request, *args, **kwargs)
+            # Stamps are bumped by integer id, so '01' must share the stamp of
+            # 1; anything else is rejected by the view without getting one.
+            try:
+                pk = int(pk)
+            except ValueError:
+                return view(request, *args, **kwargs)
+            version = get_version(kind, pk)
+            variant = request_variant(request)
+            etag = make_etag(kind, pk, version, variant)
+            etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if etag in etags or '*' in etags:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                data = get_cached_response(kind, pk, version, variant)
+                if data is not None:
+                    response = success_response(data)
+                else:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    set_cached_response(kind, pk, version, variant, response.data['data'])
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def parse_report_rows(request):
+    if request.content_type in NDJSON_CONTENT_TYPES:
+        rows = []
+        try:
+            body = request.body.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValidationError('NDJSON streams must be UTF-8 encoded')
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+        return rows
+    rows = request.data
+    if not isinstance(rows, list):
+        raise ValidationError('Expected a JSON array or NDJSON stream of reports')
+    return rows
+
+def insert_reports(reports):
+    # One savepoint per chunk: a chunk that fails as a whole is retried row
+    # by row, so a single bad row never rolls back its neighbours.
+    failed = {}
+    for start in range(0, len(reports), BULK_REPORT_CHUNK_SIZE):
+        chunk = reports[start:start + BULK_REPORT_CHUNK_SIZE]
+        try:
+            with transaction.atomic():
+                Report.objects.bulk_create(chunk)
+        except DatabaseError:
+            for report in chunk:
+                try:
+                    with transaction.atomic():
+                        report.pk = None
+                        Report.objects.bulk_create([report])
+                except DatabaseError as e:
+                    report.pk = None
+                    failed[id(report)] = str(e)
+    return failed
+
 # Create your views here.
 def reset_password_page(request):
     return render(request, 'client/reset-password.html')
@@ -131,7 +257,7 @@ def forgot_password(request):
             return error_response('User not found', status.HTTP_404_NOT_FOUND)
         user = User.objects.filter(email=email).first()
         token = signing.dumps({ 'identification': user.id })
-        send_mail(
+        enqueue_mail(
             'Reset Password',
             f'Reset your password: {request.get_host()}/api/reset-password/?token={token}',
             'Future Pulse',
@@ -161,15 +287,12 @@ def reset_password(request, token):
     return error_response('Reset Password API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
+@token_required
 def send_verification_email(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    user = request.user
     try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
         token = signing.dumps({ 'identification': user.id })
-        send_mail(
+        enqueue_mail(
             'Email Verification',
             f'Verify your email address: {request.get_host()}/api/verify-email/{token}/',
             'Future Pulse',
@@ -194,60 +317,38 @@ def verify_email(request, token):
     return success_response('Email has been verified')
 
 @api_view(['GET'])
+@token_required
+@cached_response('profile', lambda request: request.user.id)
 def profile(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    profile = Profile.objects.filter(user=user).first()
-    profile_serializer = ProfileSerializer(profile, read_only=True)
+    user = request.user
+    profile = user_profile(user)
+    profile_serializer = ProfileSerializer(profile, read_only=True, context={'request': request})
     return success_response(profile_serializer.data)
 
 @api_view(['GET'])
+@token_required
 def turn_on_notifications(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    profile = Profile.objects.filter(user=user).first()
+    user = request.user
+    profile = user_profile(user)
     profile.notification_status = True
-    profile.save()
+    profile.save(update_fields=['notification_status'])
     return success_response('Notifications are on')
 
 @api_view(['GET'])
+@token_required
 def turn_off_notifications(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    profile = Profile.objects.filter(user=user).first()
+    user = request.user
+    profile = user_profile(user)
     profile.notification_status = False
-    profile.save()
+    profile.save(update_fields=['notification_status'])
     return success_response('Notifications are off')
 
 @api_view(['GET', 'POST'])
+@token_required
 def update_profile(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    profile = Profile.objects.filter(user=user).first()
+    user = request.user
+    profile = user_profile(user)
+    picture = None
     if request.method == 'POST':
         if request.data.get('first-name'):
             user.first_name = request.data.get('first-name')
@@ -269,9 +370,10 @@ def update_profile(request):
                 user.username = request.data.get('username')
         if request.data.get('profile-picture'):
             try:
-                # image = validate_image(request.FILES.get('profile-picture'))
-                # image = optimize_image(image)
-                profile.profile_picture = request.FILES.get('profile-picture')
+                image = request.FILES.get('profile-picture')
+                validate_image(image)
+                image.seek(0)
+                picture = image.read()
             except ValidationError as e:
                 return error_response(e.detail, status.HTTP_400_BAD_REQUEST)
         if request.data.get('phone-number'):
@@ -279,21 +381,19 @@ def update_profile(request):
         if request.data.get('location'):
             profile.location = request.data.get('location')
         profile.last_modified = datetime.now()
-        user.save()
-        profile.save()
+        # Only the edited columns are written: the user and profile come from
+        # the token cache and the picture pipeline updates the profile row too.
+        user.save(update_fields=['first_name', 'last_name', 'email', 'username'])
+        profile.save(update_fields=['phone_number', 'location', 'last_modified'])
+        if picture:
+            schedule_profile_picture(profile, picture)
         return success_response('Profile has been updated')
     return error_response('Profile Update API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'POST'])
+@token_required
 def submit_report(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    user = request.user
     if request.method == 'POST':
         latitude = request.data.get('latitude')
         longitude = request.data.get('longitude')
@@ -301,41 +401,155 @@ def submit_report(request):
         description = request.data.get('description')
         sensor_data = request.data.get('sensor_data')
         rating = request.data.get('rating')
-        Report.objects.create(
-            latitude=latitude,
-            longitude=longitude,
-            report_type=report_type,
-            description=description,
-            sensor_data=sensor_data,
-            status='pending',
-            verification_status=False,
-            rating=rating, user=user)
+        with transaction.atomic():
+            report = Report(
+                latitude=latitude,
+                longitude=longitude,
+                report_type=report_type,
+                description=description,
+                sensor_data=sensor_data,
+                status='pending',
+                verification_status=False,
+                rating=rating, user=user)
+            linked = cluster_reports([report])
+            report.save()
+            record_reports([report])
+            record_readings([report])
+            record_clusters([report], linked)
         return success_response('Report has been submitted')
     return error_response('Report Submission API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@token_required
+def submit_reports(request):
+    user = request.user
+    try:
+        rows = parse_report_rows(request)
+    except ValidationError as e:
+        return error_response(e.detail, status.HTTP_400_BAD_REQUEST)
+    if not rows:
+        return error_response('Bulk Report Submission API - Reports are required', status.HTTP_400_BAD_REQUEST)
+    if len(rows) > BULK_REPORT_MAX_ROWS:
+        return error_response(f'At most {BULK_REPORT_MAX_ROWS} reports per request', status.HTTP_400_BAD_REQUEST)
+    results = []
+    reports = []
+    # A single serializer instance builds its fields once and validates every row.
+    report_serializer = ReportIngestSerializer()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results.append({'index': index, 'status': 'error', 'errors': 'Invalid report'})
+            continue
+        try:
+            validated_data = report_serializer.run_validation(row)
+        except ValidationError as e:
+            results.append({'index': index, 'status': 'error', 'errors': e.detail})
+            continue
+        report = Report(**validated_data, status='pending', verification_status=False, user=user)
+        report.update_derived_fields()
+        reports.append(report)
+        results.append({'index': index, 'report': report})
+    with transaction.atomic():
+        linked = cluster_reports(reports)
+        failed = insert_reports(reports)
+        created = [report for report in reports if id(report) not in failed]
+        release_failed([report for report in reports if id(report) in failed], created)
+        publish_reports(created)
+        record_reports(created)
+        record_readings(created)
+        record_clusters(created, linked)
+    for result in results:
+        report = result.pop('report', None)
+        if report is None:
+            continue
+        if id(report) in failed:
+            result.update({'status': 'error', 'errors': failed[id(report)]})
+        else:
+            result.update({'status': 'created', 'id': report.id})
+    return success_response({
+        'created': len(created),
+        'failed': len(rows) - len(created),
+        'results': results,
+    }, status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 @api_view(['GET'])
+@token_required
 def reports(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    reports = Report.objects.all()
+    if request.GET.get('include_expired') != 'true':
+        reports = live_reports(reports)
+    if request.GET.get('include_duplicates') != 'true':
+        reports = representatives(reports)
     try:
-        token = Token.objects.filter(key=token).first()
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    reports = Report.objects.all()[::-1]
-    reports_serializer = ReportSerializer(reports, read_only=True, many=True)
-    return success_response(reports_serializer.data)
+        reports, next_cursor = paginate(reports, request, REPORT_ENCODER)
+    except ValidationError as e:
+        return error_response(e.detail, status.HTTP_400_BAD_REQUEST)
+    return success_response(reports, next_cursor=next_cursor)
 
 @api_view(['GET'])
+@token_required
+def report_stats_view(request):
+    bucket = request.GET.get('bucket', 'hour')
+    if bucket not in STATS_BUCKETS:
+        return error_response('Invalid bucket', status.HTTP_400_BAD_REQUEST)
+    try:
+        start, end = time_range(request)
+    except ValueError:
+        return error_response('Invalid time range', status.HTTP_400_BAD_REQUEST)
+    cell_ranges = None
+    if request.GET.get('cell'):
+        cell_ranges = [geohash_range(request.GET.get('cell'))]
+        if cell_ranges[0] is None:
+            return error_response('Invalid cell', status.HTTP_400_BAD_REQUEST)
+    elif request.GET.get('bbox'):
+        try:
+            min_lat, min_lng, max_lat, max_lng = [float(value) for value in request.GET.get('bbox').split(',')]
+        except ValueError:
+            return error_response('Invalid location', status.HTTP_400_BAD_REQUEST)
+        if not -90 <= min_lat <= max_lat <= 90:
+            return error_response('Invalid location', status.HTTP_400_BAD_REQUEST)
+        cell_ranges = [cell_range for box in split_bbox(min_lat, min_lng, max_lat, max_lng) for cell_range in cover(*box)]
+    stats = report_stats(start, end, bucket, cell_ranges, request.GET.get('report_type'))
+    return success_response(stats, start=start.isoformat(), end=end.isoformat(), bucket=bucket)
+
+@api_view(['GET'])
+@token_required
+def model_metrics_view(request):
+    return success_response(model_metrics(request.GET.get('ai_model_version')))
+
+@api_view(['GET'])
+@token_required
+def prediction_memo_view(request):
+    try:
+        start, end = time_range(request)
+    except ValueError:
+        return error_response('Invalid time range', status.HTTP_400_BAD_REQUEST)
+    return success_response(memo_stats(start, end), start=start.isoformat(), end=end.isoformat())
+
+@api_view(['GET'])
+@token_required
+def sensor_series_view(request):
+    metric = request.GET.get('metric')
+    if not metric:
+        return error_response('Invalid metric', status.HTTP_400_BAD_REQUEST)
+    bucket = request.GET.get('bucket', 'hour')
+    if bucket not in SENSOR_BUCKETS:
+        return error_response('Invalid bucket', status.HTTP_400_BAD_REQUEST)
+    try:
+        start, end = time_range(request)
+    except ValueError:
+        return error_response('Invalid time range', status.HTTP_400_BAD_REQUEST)
+    if start >= end:
+        return error_response('Invalid time range', status.HTTP_400_BAD_REQUEST)
+    if series_points(start, end, bucket) > MAX_SERIES_POINTS:
+        return error_response(f'At most {MAX_SERIES_POINTS} buckets per series', status.HTTP_400_BAD_REQUEST)
+    series = sensor_series(metric, start, end, bucket)
+    return success_response(series, metric=metric, start=start.isoformat(), end=end.isoformat(), bucket=bucket)
+
+@api_view(['GET'])
+@token_required
+@cached_response('report', lambda request: request.GET.get('report'))
 def report(request):
-    token = request.GET.get('token')
     report = request.GET.get('report')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
     if not report:
         return error_response('Invalid report', status.HTTP_400_BAD_REQUEST)
     try:
@@ -345,17 +559,88 @@ def report(request):
     report_serializer = ReportSerializer(report, read_only=True)
     return success_response(report_serializer.data)
 
+@api_view(['GET'])
+@token_required
+def nearby_reports(request):
+    try:
+        limit = page_size(request)
+    except ValidationError as e:
+        return error_response(e.detail, status.HTTP_400_BAD_REQUEST)
+    center = None
+    try:
+        if request.GET.get('bbox'):
+            min_lat, min_lng, max_lat, max_lng = [float(value) for value in request.GET.get('bbox').split(',')]
+        else:
+            center = (float(request.GET.get('latitude')), float(request.GET.get('longitude')))
+            radius = min(float(request.GET.get('radius', 1000)), MAX_NEARBY_RADIUS)
+            if radius <= 0:
+                return error_response('Invalid radius', status.HTTP_400_BAD_REQUEST)
+            min_lat, min_lng, max_lat, max_lng = radius_bbox(*center, radius)
+    except (TypeError, ValueError):
+        return error_response('Invalid location', status.HTTP_400_BAD_REQUEST)
+    if not -90 <= min_lat <= max_lat <= 90:
+        return error_response('Invalid location', status.HTTP_400_BAD_REQUEST)
+    reports = Report.objects.filter(bbox_q(min_lat, min_lng, max_lat, max_lng)).order_by('-timestamp', '-id')
+    if request.GET.get('include_expired') != 'true':
+        reports = live_reports(reports)
+    if request.GET.get('include_duplicates') != 'true':
+        reports = representatives(reports)
+    latitude, longitude = REPORT_ENCODER.index('latitude'), REPORT_ENCODER.index('longitude')
+    nearby = []
+    for row in REPORT_ENCODER.values(reports).iterator(chunk_size=limit):
+        if not in_bbox(row[latitude], row[longitude], min_lat, min_lng, max_lat, max_lng):
+            continue
+        distance = haversine(*center, row[latitude], row[longitude]) if center else None
+        if distance is None or distance <= radius:
+            item = REPORT_ENCODER.encode(row)
+            if center:
+                item['distance'] = round(distance, 1)
+            nearby.append(item)
+            if len(nearby) >= limit:
+                break
+    return success_response(nearby)
+
+@api_view(['GET'])
+@token_required
+def search(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return error_response('Invalid query', status.HTTP_400_BAD_REQUEST)
+    search_type = request.GET.get('type', 'reports')
+    if search_type == 'reports':
+        queryset, encoder, prefix = Report.objects.all(), REPORT_ENCODER, ''
+        if request.GET.get('include_duplicates') != 'true':
+            queryset = representatives(queryset)
+    elif search_type == 'predictions':
+        queryset, encoder, prefix = Prediction.objects.all(), PREDICTION_ENCODER, 'report__'
+    else:
+        return error_response('Invalid type', status.HTTP_400_BAD_REQUEST)
+    for field in ('report_type', 'status'):
+        if request.GET.get(field):
+            queryset = queryset.filter(**{prefix + field: request.GET.get(field)})
+    try:
+        limit = page_size(request)
+        cursor = request.GET.get('cursor')
+        cursor = decode_cursor(cursor, float) if cursor else None
+    except ValidationError as e:
+        return error_response(e.detail, status.HTTP_400_BAD_REQUEST)
+    rows = list(encoder.values(search_queryset(queryset, query, cursor), 'rank')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-1], rows[-1][encoder.index('id')])
+    data = []
+    for row in rows:
+        item = encoder.encode(row)
+        item['rank'] = row[-1]
+        data.append(item)
+    return success_response(data, next_cursor=next_cursor)
+
 @api_view(['GET', 'POST'])
+@token_required
 def submit_prediction(request):
-    token = request.GET.get('token')
     report = request.GET.get('report')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    user = request.user
     if not report:
         return error_response('Invalid report', status.HTTP_400_BAD_REQUEST)
     try:
@@ -368,46 +653,36 @@ def submit_prediction(request):
         confidence_score = request.data.get('confidence_score')
         valid_until = request.data.get('valid_until')
         ai_model_version = request.data.get('ai_model_version')
-        prediction = Prediction.objects.create(
-            predicted_event=predicted_event,
-            generated_text=generated_text,
-            confidence_score=confidence_score,
-            valid_until=valid_until if valid_until else None,
-            ai_model_version=ai_model_version,
-            user=user,
-            report=report)
-        prediction_serializer = PredictionSerializer(prediction, read_only=True)
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            'notifications',
-            {'type': 'send_notification', 'message': prediction_serializer.data}
-        )
+        with transaction.atomic():
+            prediction = Prediction.objects.create(
+                predicted_event=predicted_event,
+                generated_text=generated_text,
+                confidence_score=confidence_score,
+                valid_until=valid_until if valid_until else None,
+                ai_model_version=ai_model_version,
+                user=user,
+                report=report)
+            notify_prediction(report, PREDICTION_ENCODER.encode_instance(prediction))
         return success_response('Prediction has been submitted')
     return error_response('Prediction Submission API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
+@token_required
 def predictions(request):
-    token = request.GET.get('token')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    predictions = Prediction.objects.all()
+    if request.GET.get('include_expired') != 'true':
+        predictions = live_predictions(predictions)
     try:
-        token = Token.objects.filter(key=token).first()
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    predictions = Prediction.objects.all()[::-1]
-    predictions_serializer = PredictionSerializer(predictions, read_only=True, many=True)
-    return success_response(predictions_serializer.data)
+        predictions, next_cursor = paginate(predictions, request, PREDICTION_ENCODER)
+    except ValidationError as e:
+        return error_response(e.detail, status.HTTP_400_BAD_REQUEST)
+    return success_response(predictions, next_cursor=next_cursor)
 
 @api_view(['GET'])
+@token_required
+@cached_response('prediction', lambda request: request.GET.get('prediction'))
 def prediction(request):
-    token = request.GET.get('token')
     prediction = request.GET.get('prediction')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
     if not prediction:
         return error_response('Invalid prediction', status.HTTP_400_BAD_REQUEST)
     try:
@@ -418,54 +693,40 @@ def prediction(request):
     return success_response(prediction_serializer.data)
 
 @api_view(['GET', 'POST'])
+@token_required
 def submit_report_feedback(request):
-    token = request.GET.get('token')
     report = request.GET.get('report')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    user = request.user
     if request.method == 'POST':
         rating = request.data.get('rating')
         comment = request.data.get('comment')
         is_accurate = request.data.get('is_accurate')
-        Feedback.objects.create(rating=rating, comment=comment, is_accurate=is_accurate, report=report)
+        if not report or not Report.objects.filter(id=report).exists():
+            return error_response('Report not found', status.HTTP_400_BAD_REQUEST)
+        Feedback.objects.create(rating=rating, comment=comment, is_accurate=is_accurate, report_id=report, user=user)
         return success_response('Feedback has been submitted')
     return error_response('Feedback Submission API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'POST'])
+@token_required
 def submit_prediction_feedback(request):
-    token = request.GET.get('token')
     prediction = request.GET.get('prediction')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    user = request.user
     if request.method == 'POST':
         rating = request.data.get('rating')
         comment = request.data.get('comment')
         is_accurate = request.data.get('is_accurate')
-        Feedback.objects.create(rating=rating, comment=comment, is_accurate=is_accurate, prediction=prediction)
+        if not prediction or not Prediction.objects.filter(id=prediction).exists():
+            return error_response('Prediction not found', status.HTTP_400_BAD_REQUEST)
+        Feedback.objects.create(rating=rating, comment=comment, is_accurate=is_accurate, prediction_id=prediction, user=user)
         return success_response('Feedback has been submitted')
     return error_response('Feedback Submission API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'POST'])
+@token_required
 def submit_feedback_reply(request):
-    token = request.GET.get('token')
     feedback = request.GET.get('feedback')
-    if not token:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
-    try:
-        token = Token.objects.filter(key=token).first()
-        user = token.user
-    except:
-        return error_response('Invalid token', status.HTTP_400_BAD_REQUEST)
+    user = request.user
     if not feedback:
         return error_response('Invalid feedback', status.HTTP_400_BAD_REQUEST)
     try:
@@ -474,32 +735,68 @@ def submit_feedback_reply(request):
         return error_response('Feedback not found', status.HTTP_400_BAD_REQUEST)
     if request.method == 'POST':
         comment = request.data.get('comment')
+        if feedback is None:
+            return error_response('Feedback not found', status.HTTP_400_BAD_REQUEST)
         Feedback.objects.create(comment=comment, parent_feedback=feedback, user=user)
         return success_response('Reply has been submitted')
     return error_response('Feedback Reply Submission API - Fields are required', status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
+@cached_response('feedbacks', lambda request: request.GET.get('prediction'))
 def feedbacks(request):
     prediction = request.GET.get('prediction')
     if not prediction:
         return error_response('Invalid parameters', status.HTTP_400_BAD_REQUEST)
     try:
         prediction = Prediction.objects.filter(id=prediction).first()
-        feedbacks = prediction.feedbacks
+        feedbacks = prediction.feedbacks.order_by('timestamp')
     except:
         return error_response('Prediction not found', status.HTTP_400_BAD_REQUEST)
-    feedbacks_serializer = FeedbackSerializer(feedbacks, read_only=True, many=True)
-    return success_response(feedbacks_serializer.data)
+    return success_response(FEEDBACK_ENCODER.encode_many(FEEDBACK_ENCODER.values(feedbacks)))
 
 @api_view(['GET'])
+@cached_response('replies', lambda request: request.GET.get('feedback'))
 def replies(request):
     feedback = request.GET.get('feedback')
     if not feedback:
         return error_response('Invalid parameters', status.HTTP_400_BAD_REQUEST)
     try:
         feedback = Feedback.objects.filter(id=feedback).first()
-        replies = feedback.replies
+        replies = feedback.replies.order_by('timestamp')
     except:
         return error_response('Feedback not found', status.HTTP_400_BAD_REQUEST)
-    replies_serializer = FeedbackSerializer(replies, read_only=True, many=True)
-    return success_response(replies_serializer.data)
+    return success_response(FEEDBACK_ENCODER.encode_many(FEEDBACK_ENCODER.values(replies)))
+
+def nest_feedbacks(feedbacks):
+    # `feedbacks` come in path order, so every parent precedes its replies.
+    nodes, thread = {}, []
+    for item in feedbacks:
+        item['replies'] = []
+        nodes[item['id']] = item
+        parent = nodes.get(item['parent_feedback'])
+        (parent['replies'] if parent is not None else thread).append(item)
+    return thread
+
+@api_view(['GET'])
+def feedback_thread(request):
+    try:
+        depth = int(request.GET.get('depth', MAX_THREAD_DEPTH))
+    except ValueError:
+        return error_response('Invalid depth', status.HTTP_400_BAD_REQUEST)
+    depth = max(0, min(depth, MAX_THREAD_DEPTH))
+    try:
+        if request.GET.get('feedback'):
+            feedback = Feedback.objects.get(id=request.GET.get('feedback'))
+            feedbacks = Feedback.objects.filter(root_id=feedback.root_id, path__startswith=feedback.path, depth__lte=feedback.depth + depth)
+        elif request.GET.get('prediction'):
+            roots = Feedback.objects.filter(prediction_id=request.GET.get('prediction'), parent_feedback__isnull=True)
+            feedbacks = Feedback.objects.filter(root__in=roots.values('id'), depth__lte=depth)
+        elif request.GET.get('report'):
+            roots = Feedback.objects.filter(report_id=request.GET.get('report'), parent_feedback__isnull=True)
+            feedbacks = Feedback.objects.filter(root__in=roots.values('id'), depth__lte=depth)
+        else:
+            return error_response('Invalid parameters', status.HTTP_400_BAD_REQUEST)
+        feedbacks = FEEDBACK_ENCODER.encode_many(FEEDBACK_ENCODER.values(feedbacks.order_by('path')))
+    except (Feedback.DoesNotExist, ValueError):
+        return error_response('Feedback not found', status.HTTP_400_BAD_REQUEST)
+    return success_response(nest_feedbacks(feedbacks))
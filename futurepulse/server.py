@@ -0,0 +1,45 @@
+"""
+daphne entry point with permessage-deflate enabled for WebSockets.
+
+daphne leaves autobahn's compression options unset, so clients offering
+permessage-deflate get uncompressed frames. Run this module in place of the
+daphne command; it accepts the same arguments:
+
+    python -m futurepulse.server -b 0.0.0.0 -p 8000 futurepulse.asgi:application
+"""
+
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+from daphne.cli import CommandLineInterface as DaphneCommandLineInterface
+from daphne.server import Server as DaphneServer
+
+
+def accept_deflate(offers):
+    for offer in offers:
+        if isinstance(offer, PerMessageDeflateOffer):
+            return PerMessageDeflateOfferAccept(offer)
+    return None
+
+
+class Server(DaphneServer):
+    def run(self):
+        # The WebSocket factory is built inside run(), right before the
+        # reactor starts and the ready callback fires, so options go in there.
+        ready_callable = self.ready_callable
+
+        def configure():
+            from django.conf import settings
+            if getattr(settings, 'WEBSOCKET_COMPRESSION', True):
+                self.ws_factory.setProtocolOptions(perMessageCompressionAccept=accept_deflate)
+            if ready_callable:
+                ready_callable()
+
+        self.ready_callable = configure
+        super().run()
+
+
+class CommandLineInterface(DaphneCommandLineInterface):
+    server_class = Server
+
+
+if __name__ == '__main__':
+    CommandLineInterface.entrypoint()
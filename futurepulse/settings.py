@@ -65,6 +65,12 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+PROFILE_PICTURE_STORAGE = os.environ.get('PROFILE_PICTURE_STORAGE', 'cloudinary_storage.storage.MediaCloudinaryStorage')
+
+PROFILE_PICTURE_SIZES = (64, 256, 800)
+
+IMAGE_PIPELINE_WORKERS = 2
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -173,6 +179,39 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 
 EMAIL_USE_TLS = True
 
+MAIL_QUEUE_BATCH_SIZE = 50
+
+MAIL_QUEUE_MAX_ATTEMPTS = 5
+
+MAIL_QUEUE_RETRY_DELAY = 30
+
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'client.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+
+# Only the Redis cache is shared between processes. Without REDIS_URL each
+# process has its own locmem cache, so token invalidation and response cache
+# version bumps reach only the process that made them; the others serve their
+# copy until TOKEN_CACHE_TTL / RESPONSE_CACHE_TTL runs out. Run a single
+# process or set REDIS_URL.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+RESPONSE_CACHE_TTL = 600
+
+CACHE_VERSION_TTL = 86400 # seconds; an expired stamp reads as a fresh version
+
 
 CHANNEL_LAYERS = {
     'default': {
@@ -180,5 +219,64 @@ CHANNEL_LAYERS = {
         'CONFIG': {
             'hosts': [os.environ.get('REDIS_URL')],
         },
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
     },
 }
+
+
+NOTIFICATION_DISPATCH_BATCH_SIZE = 200
+
+NOTIFICATION_DISPATCH_MAX_IN_FLIGHT = 50
+
+NOTIFICATION_DISPATCH_MAX_ATTEMPTS = 8
+
+NOTIFICATION_DISPATCH_RETRY_DELAY = 1
+
+NOTIFICATION_BATCH_SIZE = 20
+
+NOTIFICATION_BATCH_WINDOW = 50 # ms, for sockets that connect with ?batch=1; 0 sends every notification in its own frame
+
+WEBSOCKET_COMPRESSION = True
+
+SSE_KEEPALIVE = 15 # seconds between keepalive comments on idle event streams
+
+SSE_REPLAY_LIMIT = 500
+
+
+STATS_CELL_PRECISION = 4
+
+SENSOR_MAX_SERIES_POINTS = 2000
+
+PREDICTOR = 'client.predictors.HeuristicPredictor'
+
+PREDICTION_BATCH_SIZE = 500
+
+PREDICTION_WORKERS = 2 # predictor processes per generate_predictions worker
+
+PREDICTION_MEMO_SIZE = 10000 # 0 runs the predictor for every report
+
+PREDICTION_MEMO_TTL = 3600 # seconds a result without valid_until stays memoized
+
+PREDICTION_SIGNATURE_PRECISION = 6 # geohash length of the grid cell in a report's feature signature
+
+PREDICTION_SIGNATURE_BUCKET = 60 # minutes
+
+MODEL_METRICS_BATCH_SIZE = 100000
+
+MODEL_METRICS_CALIBRATION_BINS = 10 # changing this needs refresh_model_metrics --all
+
+
+REPORT_EXPIRY_HOURS = 24
+
+REPORT_CLUSTER_RADIUS = 150 # metres
+
+REPORT_CLUSTER_WINDOW = 15 # minutes
+
+PREDICTION_RETENTION_DAYS = 7
+
+NOTIFICATION_RETENTION_HOURS = 6 # how far back an SSE reconnect can replay
+
+MAIL_RETENTION_HOURS = 24
+
+LIFECYCLE_BATCH_SIZE = 1000